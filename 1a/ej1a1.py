@@ -33,7 +33,25 @@ versión modificada de este bytearray tras incrementar cada byte, y finalmente,
 el bytearray modificado.
 """
 
-from typing import ByteString, Union
+import codecs
+import io
+import mmap
+import os
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import BinaryIO, ByteString, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+import numpy as np
+
+# Tamaño de los trozos leídos por el pipeline en streaming.
+STREAM_CHUNK_SIZE = 1 << 16
+# Tamaño de bloque del modo mmap; se redondea a múltiplos de mmap.ALLOCATIONGRANULARITY.
+MMAP_BLOCK_SIZE = 1 << 24
+# Número de mensajes que procesa cada tarea del modo por lotes con procesos.
+BATCH_CHUNK_SIZE = 10_000
 
 
 def text_to_bytes(text: str) -> bytes:
@@ -43,16 +61,29 @@ def text_to_bytes(text: str) -> bytes:
 
 def reverse_bytes(bytes_data: ByteString) -> bytearray:
     # Write here your code
-    return bytearray(reversed(bytes_data))
+    return bytearray(bytes_data[::-1])
+
+
+@lru_cache(maxsize=256)
+def _rollover_table(k: int) -> bytes:
+    return bytes((value + k) % 256 for value in range(256))
 
 
-def increment_bytearray_rollover(byte_array: bytearray) -> bytearray:
+def increment_bytearray_rollover(
+    byte_array: Union[bytearray, memoryview], k: int = 1, in_place: bool = False
+) -> Union[bytearray, memoryview]:
     # Write here your code
-    result = bytearray(byte_array)
-    for i in range(len(result)):
-        result[i] = (result[i] + 1) % 256
+    if not in_place:
+        # Una sola copia: el resultado se incrementa después en su sitio.
+        byte_array = bytearray(byte_array)
 
-    return result
+    view = memoryview(byte_array).cast("B")
+    if view.readonly:
+        raise TypeError("in_place requires a writable buffer")
+    # La suma en uint8 sobre el propio buffer da la vuelta módulo 256 sin copias intermedias.
+    values = np.frombuffer(view, dtype=np.uint8)
+    values += k % 256
+    return byte_array
 
 
 def bytes_to_text(bytes_data: Union[bytes, bytearray]) -> str:
@@ -60,6 +91,189 @@ def bytes_to_text(bytes_data: Union[bytes, bytearray]) -> str:
     return bytes_data.decode("utf-8")
 
 
+def iter_transformed_chunks(
+    source: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE, k: int = 1
+) -> Iterator[str]:
+    """Aplica el pipeline completo leyendo `source` (UTF-8, seekable) desde el final por trozos."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    position = source.seek(0, io.SEEK_END)
+    while position > 0:
+        size = min(chunk_size, position)
+        position -= size
+        source.seek(position)
+        chunk = reverse_bytes(source.read(size))
+        text = decoder.decode(increment_bytearray_rollover(chunk, k, in_place=True))
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def transform_stream(
+    source: BinaryIO, sink: TextIO, chunk_size: int = STREAM_CHUNK_SIZE, k: int = 1
+) -> int:
+    """Escribe en `sink` el texto transformado y devuelve el número de caracteres escritos."""
+    written = 0
+    for text in iter_transformed_chunks(source, chunk_size, k):
+        written += sink.write(text)
+    return written
+
+
+def transform_file(
+    source_path: Union[str, os.PathLike],
+    target_path: Union[str, os.PathLike],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    k: int = 1,
+) -> int:
+    with open(source_path, "rb") as source, open(target_path, "w", encoding="utf-8", newline="") as sink:
+        return transform_stream(source, sink, chunk_size, k)
+
+
+def _aligned_block_size(block_size: int) -> int:
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+    granularity = mmap.ALLOCATIONGRANULARITY
+    return max(granularity, block_size - block_size % granularity)
+
+
+def _map_window(fileno: int, start: int, length: int, access: int = mmap.ACCESS_READ) -> Tuple[mmap.mmap, int]:
+    # mmap exige que el offset sea múltiplo de ALLOCATIONGRANULARITY.
+    offset = start - start % mmap.ALLOCATIONGRANULARITY
+    return mmap.mmap(fileno, length + start - offset, access=access, offset=offset), start - offset
+
+
+def _transform_block(fileno: int, start: int, size: int, table: bytes) -> bytes:
+    window, delta = _map_window(fileno, start, size)
+    with window:
+        return window[delta:delta + size][::-1].translate(table)
+
+
+def _write_block(fileno: int, start: int, data: bytes) -> None:
+    window, delta = _map_window(fileno, start, len(data), mmap.ACCESS_WRITE)
+    with window:
+        window[delta:delta + len(data)] = data
+
+
+def transform_file_mmap(
+    source_path: Union[str, os.PathLike],
+    target_path: Optional[Union[str, os.PathLike]] = None,
+    block_size: int = MMAP_BLOCK_SIZE,
+    k: int = 1,
+) -> int:
+    """Invierte e incrementa un fichero por bloques mapeados en memoria.
+
+    Sin `target_path` el fichero se transforma in situ; en otro caso se escribe en `target_path`,
+    que se redimensiona al tamaño del origen. Cada bloque se mapea y libera por separado, de modo
+    que la memoria residente depende de `block_size` y no del tamaño del fichero.
+    """
+    block_size = _aligned_block_size(block_size)
+    table = _rollover_table(k % 256)
+    size = os.path.getsize(source_path)
+
+    if target_path is None:
+        with open(source_path, "r+b") as file:
+            fileno = file.fileno()
+            front, back = 0, size
+            while back - front > 1:
+                length = min(block_size, (back - front) // 2)
+                head = _transform_block(fileno, front, length, table)
+                tail = _transform_block(fileno, back - length, length, table)
+                _write_block(fileno, front, tail)
+                _write_block(fileno, back - length, head)
+                front += length
+                back -= length
+            if back - front == 1:
+                _write_block(fileno, front, _transform_block(fileno, front, 1, table))
+        return size
+
+    with open(source_path, "rb") as source, open(target_path, "w+b") as target:
+        target.truncate(size)
+        for start in range(0, size, block_size):
+            length = min(block_size, size - start)
+            window, delta = _map_window(source.fileno(), start, length)
+            with window:
+                data = window[delta:delta + length][::-1].translate(table)
+            _write_block(target.fileno(), size - start - length, data)
+    return size
+
+
+def benchmark_file_transform(size: int = 64 << 20, block_size: int = MMAP_BLOCK_SIZE) -> Dict[str, float]:
+    """Compara en segundos el camino en memoria con el modo mmap sobre un fichero aleatorio."""
+    timings = {}
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.bin")
+        target = os.path.join(directory, "target.bin")
+        with open(source, "wb") as file:
+            file.write(os.urandom(size))
+
+        start = time.perf_counter()
+        with open(source, "rb") as file:
+            data = increment_bytearray_rollover(reverse_bytes(file.read()))
+        with open(target, "wb") as file:
+            file.write(data)
+        timings["in_memory"] = time.perf_counter() - start
+        del data
+
+        start = time.perf_counter()
+        transform_file_mmap(source, target, block_size)
+        timings["mmap_to_target"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        transform_file_mmap(source, block_size=block_size)
+        timings["mmap_in_place"] = time.perf_counter() - start
+    return timings
+
+
+def _transform_packed(payloads: List[Union[str, ByteString]], k: int) -> List[Union[str, bytearray]]:
+    encoded = [text_to_bytes(payload) if isinstance(payload, str) else payload for payload in payloads]
+    offsets = array("q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    # Invertir el buffer completo invierte también el orden de los mensajes: el mensaje i
+    # queda en [total - offsets[i + 1], total - offsets[i]).
+    buffer = increment_bytearray_rollover(reverse_bytes(b"".join(encoded)), k, in_place=True)
+    total = offsets[-1]
+    # Si el resultado es ASCII los offsets en bytes coinciden con los de caracteres y basta
+    # con decodificar una sola vez.
+    text = bytes_to_text(buffer) if buffer.isascii() else None
+    results = []
+    for payload, start, end in zip(payloads, offsets, offsets[1:]):
+        if not isinstance(payload, str):
+            results.append(buffer[total - end:total - start])
+        elif text is not None:
+            results.append(text[total - end:total - start])
+        else:
+            results.append(bytes_to_text(buffer[total - end:total - start]))
+    return results
+
+
+def transform_batch(
+    payloads: Iterable[Union[str, ByteString]],
+    k: int = 1,
+    max_workers: int = 1,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+) -> List[Union[str, bytearray]]:
+    """Aplica el pipeline a muchos mensajes de una vez, conservando el orden de entrada.
+
+    Los `str` se devuelven decodificados y los bytes como `bytearray`. Con `max_workers > 1` los
+    lotes de más de `chunk_size` mensajes se reparten en un `ProcessPoolExecutor`.
+    """
+    payloads = list(payloads)
+    if max_workers <= 1 or len(payloads) <= chunk_size:
+        return _transform_packed(payloads, k)
+
+    chunks = [payloads[start:start + chunk_size] for start in range(0, len(payloads), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_results in executor.map(_transform_packed, chunks, repeat(k)):
+            results.extend(chunk_results)
+    return results
+
+
 # Para probar el código, descomenta las siguientes líneas
 if __name__ == "__main__":
     original_text = "Hola Mundo!"
@@ -1,4 +1,6 @@
+import io
 from ej1a1 import text_to_bytes, reverse_bytes, increment_bytearray_rollover, bytes_to_text
+from ej1a1 import iter_transformed_chunks, transform_stream, transform_file, transform_file_mmap, transform_batch
 
 
 def test_text_to_bytes():
@@ -14,3 +16,79 @@ def test_increment_bytearray_rollover():
 
 def test_bytes_to_text():
     assert bytes_to_text(b"Hello") == "Hello", "Should decode bytes to text"
+
+def test_increment_bytearray_rollover_k():
+    incremented = increment_bytearray_rollover(bytearray([250, 5, 0]), k=10)
+    assert incremented == bytearray([4, 15, 10]), "Should increment each byte by k and rollover at 256"
+    assert increment_bytearray_rollover(bytearray([3]), k=-4) == bytearray([255]), "Negative k should roll under 0"
+
+def test_increment_bytearray_rollover_in_place():
+    byte_array = bytearray([255, 0, 1, 254])
+    result = increment_bytearray_rollover(byte_array, in_place=True)
+    assert result is byte_array, "In-place mode should return the same buffer"
+    assert byte_array == bytearray([0, 1, 2, 255]), "In-place mode should mutate the caller's buffer"
+
+    buffer = bytearray(b"abcd")
+    increment_bytearray_rollover(memoryview(buffer)[1:3], in_place=True)
+    assert buffer == bytearray(b"acdd"), "In-place mode should only touch the memoryview's slice"
+
+def _in_memory_pipeline(text, k=1):
+    return bytes_to_text(increment_bytearray_rollover(reverse_bytes(text_to_bytes(text)), k))
+
+def test_transform_stream_matches_in_memory_pipeline():
+    text = "Hola Mundo! " * 50
+    for chunk_size in (1, 7, 64, 4096):
+        sink = io.StringIO()
+        transform_stream(io.BytesIO(text_to_bytes(text)), sink, chunk_size=chunk_size)
+        assert sink.getvalue() == _in_memory_pipeline(text), "Streaming output should match the in-memory path"
+
+def test_transform_stream_multibyte_boundaries():
+    # Entrada preparada para que, tras invertir e incrementar, el resultado sea UTF-8 válido.
+    source_bytes = bytes(reversed("ñandú€".encode("utf-8")))
+    source_bytes = bytes((value - 1) % 256 for value in source_bytes)
+    for chunk_size in (1, 2, 3, 5):
+        assert "".join(iter_transformed_chunks(io.BytesIO(source_bytes), chunk_size)) == "ñandú€", \
+            "Multibyte characters split across chunks should be decoded intact"
+
+def test_transform_file(tmp_path):
+    source = tmp_path / "source.txt"
+    target = tmp_path / "target.txt"
+    source.write_bytes(text_to_bytes("Hola Mundo!"))
+    transform_file(source, target, chunk_size=3)
+    assert target.read_text(encoding="utf-8") == '"peovN!bmpI', "The file pipeline should match the example output"
+
+def test_transform_file_mmap(tmp_path):
+    payload = bytes(range(256)) * 1000 + b"xyz"
+    expected = increment_bytearray_rollover(reverse_bytes(payload), k=3)
+    source = tmp_path / "source.bin"
+    target = tmp_path / "target.bin"
+    source.write_bytes(payload)
+    assert transform_file_mmap(source, target, block_size=1, k=3) == len(payload)
+    assert target.read_bytes() == expected, "The mmap copy should match the in-memory transform"
+    transform_file_mmap(source, block_size=1, k=3)
+    assert source.read_bytes() == expected, "The in-place mmap transform should match the in-memory transform"
+
+def test_transform_file_mmap_small_files(tmp_path):
+    for payload in (b"", b"a", b"ab", b"abc"):
+        source = tmp_path / "source.bin"
+        source.write_bytes(payload)
+        transform_file_mmap(source)
+        assert source.read_bytes() == increment_bytearray_rollover(reverse_bytes(payload)), \
+            "Tiny files should be transformed in place"
+
+def test_transform_batch_matches_scalar_pipeline():
+    payloads = ["Hola Mundo!", "", b"\xff\x00abc", "Python", bytearray(b"xyz")]
+    expected = [
+        _in_memory_pipeline("Hola Mundo!"),
+        "",
+        increment_bytearray_rollover(reverse_bytes(b"\xff\x00abc")),
+        _in_memory_pipeline("Python"),
+        bytearray(b"{zy"),
+    ]
+    assert transform_batch(payloads) == expected, "Batch results should match the scalar pipeline in order"
+
+def test_transform_batch_process_pool():
+    payloads = [f"message {i}" for i in range(50)]
+    expected = [_in_memory_pipeline(payload) for payload in payloads]
+    assert transform_batch(payloads, max_workers=2, chunk_size=7) == expected, \
+        "The process pool backend should keep results in input order"
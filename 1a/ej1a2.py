@@ -61,71 +61,483 @@ Salida esperada:
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import asyncio
+import heapq
+import inspect
+import os
+import tracemalloc
+import numpy as np
+import pandas as pd
 import pytz
 
+# Origen de los instantes precalculados: microsegundos desde 1970-01-01 UTC.
+_EPOCH = datetime(1970, 1, 1, tzinfo=pytz.UTC)
 
-def create_event(name: str, datetime_start: datetime, timezone_str: str) -> Dict[str, str]:
-    timezone = pytz.timezone(timezone_str)
-    localized_datetime = datetime_start.replace(tzinfo=timezone)
-    return {
+# Reglas de recurrencia admitidas y su paso en hora local.
+RECURRENCE_STEPS = {"daily": timedelta(days=1), "weekly": timedelta(weeks=1)}
+
+
+@lru_cache(maxsize=512)
+def get_timezone(timezone_str: str) -> pytz.BaseTzInfo:
+    return pytz.timezone(timezone_str)
+
+
+def _to_epoch_us(aware_datetime: datetime) -> int:
+    return (aware_datetime - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_epoch_us(epoch_us: int, timezone: pytz.BaseTzInfo) -> datetime:
+    return (_EPOCH + timedelta(microseconds=epoch_us)).astimezone(timezone)
+
+
+def _now_epoch_us() -> int:
+    return _to_epoch_us(datetime.now(pytz.UTC))
+
+
+def _localize(datetime_start: datetime, timezone: pytz.BaseTzInfo) -> datetime:
+    if datetime_start.tzinfo is None:
+        return timezone.localize(datetime_start)
+    return datetime_start.astimezone(timezone)
+
+
+def _event_epoch_us(event: Dict[str, Any]) -> int:
+    epoch_us = event.get("utc_epoch_us")
+    if epoch_us is None:
+        # Eventos creados sin create_event: se calcula el instante a partir de sus campos.
+        epoch_us = _to_epoch_us(_localize(event["datetime_start"], get_timezone(event["timezone"])))
+    return epoch_us
+
+
+def create_event(
+    name: str, datetime_start: datetime, timezone_str: str, recurrence: Optional[str] = None
+) -> Dict[str, str]:
+    localized_datetime = _localize(datetime_start, get_timezone(timezone_str))
+    event = {
         "name": name,
         "datetime_start": localized_datetime,
-        "timezone": timezone_str
+        "timezone": timezone_str,
+        "utc_epoch_us": _to_epoch_us(localized_datetime),
+    }
+    if recurrence is not None:
+        if recurrence not in RECURRENCE_STEPS:
+            raise ValueError(f"Unsupported recurrence: {recurrence!r}")
+        event["recurrence"] = recurrence
+    return event
 
 
 def time_until_event(event: Dict[str, str]) -> timedelta:
-    event_timezone = pytz.timezone(event["timezone"])
-    event_datetime = event["datetime_start"]
-    if event_datetime.tzinfo is none:
-        event_datetime = event_timezone.localize(event_datetime)
-
-    current_datetime = datetime.now(event_timezone)
-    
-    return event_datetime - current_datetime
+    return timedelta(microseconds=_event_epoch_us(event) - _now_epoch_us())
 
 
 def change_event_timezone(event: Dict[str, str], new_timezone_str: str) -> Dict[str, str]:
+    epoch_us = _event_epoch_us(event)
     new_event = event.copy()
-    
-    old_timezone = pytz.timezone(event["timezone"])
-    new_timezone = pytz.timezone(new_timezone_str)
+    new_event["datetime_start"] = _from_epoch_us(epoch_us, get_timezone(new_timezone_str))
+    new_event["timezone"] = new_timezone_str
+    new_event["utc_epoch_us"] = epoch_us
+    return new_event
 
-    event_datetime = event["datetime_start"]
 
-    if event_datetime.tzinfo is None:
-        event_datetime = old_timezone.localize(event_datetime)
+def find_next_event(events: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    current_us = _now_epoch_us()
+
+    next_event = None
+    next_us = None
+    for event in events:
+        if event.get("recurrence"):
+            event = _occurrence(event, _first_occurrence_after(event, current_us))
+        event_us = _event_epoch_us(event)
+        if event_us > current_us and (next_us is None or event_us < next_us):
+            next_us = event_us
+            next_event = event
 
-    new_datetime = event_datetime.astimezone(new_timezone)
-    new_event["datatime_start"] = new_datetime
-    new_event["timezone"] = new_timezone-str
+    return next_event
 
-    return new_event
 
+def _occurrence(event: Dict[str, Any], index: int) -> Dict[str, Any]:
+    # La repetición se calcula en hora local para que no se desplace con los cambios de horario.
+    wall_clock = event["datetime_start"].replace(tzinfo=None) + index * RECURRENCE_STEPS[event["recurrence"]]
+    return create_event(event["name"], wall_clock, event["timezone"])
 
-def find_next_event(events: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
-    current_utc = datetime.now(pytz.UTC)
 
-    next_event = None
-    min_time_diff = None
+def _first_occurrence_after(event: Dict[str, Any], after_us: int) -> int:
+    base_us = _event_epoch_us(event)
+    if after_us < base_us:
+        return 0
+    step_us = RECURRENCE_STEPS[event["recurrence"]] // timedelta(microseconds=1)
+    index = (after_us - base_us) // step_us + 1
+    # La estimación en UTC puede desviarse por un cambio de horario; se corrige localmente.
+    while index > 0 and _event_epoch_us(_occurrence(event, index - 1)) > after_us:
+        index -= 1
+    while _event_epoch_us(_occurrence(event, index)) <= after_us:
+        index += 1
+    return index
 
-    for event in events:
-        event_datetime = event["datetime_start"]
-        if event_datetime.tzinfo is not None:
-            event_utc = event_datetime.astimezone(pytz.UTC)
 
+def iter_occurrences(event: Dict[str, Any], after: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+    """Genera perezosamente las ocurrencias de un evento (posteriores a `after` si se indica)."""
+    if not event.get("recurrence"):
+        if after is None or _event_epoch_us(event) > _to_epoch_us(after):
+            yield event
+        return
+
+    index = 0 if after is None else _first_occurrence_after(event, _to_epoch_us(after))
+    while True:
+        yield _occurrence(event, index)
+        index += 1
+
+
+def merge_occurrences(
+    events: Iterable[Dict[str, Any]], after: Optional[datetime] = None
+) -> Iterator[Dict[str, Any]]:
+    """Mezcla las ocurrencias de varias series en orden UTC sin materializarlas."""
+    return heapq.merge(*(iter_occurrences(event, after) for event in events), key=_event_epoch_us)
+
+
+_TIMEZONE_NAMES: List[str] = []
+_TIMEZONE_IDS: Dict[str, int] = {}
+
+
+def timezone_id(timezone_str: str) -> int:
+    tz_id = _TIMEZONE_IDS.get(timezone_str)
+    if tz_id is None:
+        get_timezone(timezone_str)
+        tz_id = len(_TIMEZONE_NAMES)
+        _TIMEZONE_NAMES.append(timezone_str)
+        _TIMEZONE_IDS[timezone_str] = tz_id
+    return tz_id
+
+
+class Event:
+    """Evento compacto: nombre, instante UTC en microsegundos e id de zona horaria.
+
+    Admite el acceso por clave de los diccionarios de `create_event` (`event["timezone"]`,
+    `get`, `copy`...), por lo que las funciones existentes aceptan indistintamente ambos tipos.
+    """
+
+    __slots__ = ("name", "utc_epoch_us", "timezone_id")
+    _KEYS = ("name", "datetime_start", "timezone", "utc_epoch_us")
+
+    def __init__(self, name: str, utc_epoch_us: int, timezone_id: int) -> None:
+        self.name = name
+        self.utc_epoch_us = utc_epoch_us
+        self.timezone_id = timezone_id
+
+    @classmethod
+    def create(cls, name: str, datetime_start: datetime, timezone_str: str) -> "Event":
+        localized_datetime = _localize(datetime_start, get_timezone(timezone_str))
+        return cls(name, _to_epoch_us(localized_datetime), timezone_id(timezone_str))
+
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any]) -> "Event":
+        return cls(event["name"], _event_epoch_us(event), timezone_id(event["timezone"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self._KEYS}
+
+    @property
+    def timezone(self) -> str:
+        return _TIMEZONE_NAMES[self.timezone_id]
+
+    @property
+    def datetime_start(self) -> datetime:
+        return _from_epoch_us(self.utc_epoch_us, get_timezone(self.timezone))
+
+    def change_timezone(self, new_timezone_str: str) -> None:
+        self.timezone_id = timezone_id(new_timezone_str)
+
+    def copy(self) -> "Event":
+        return Event(self.name, self.utc_epoch_us, self.timezone_id)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._KEYS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "timezone":
+            self.change_timezone(value)
+        elif key == "datetime_start":
+            self.utc_epoch_us = _to_epoch_us(_localize(value, get_timezone(self.timezone)))
+        elif key in self._KEYS:
+            setattr(self, key, value)
         else:
+            raise KeyError(key)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Event):
+            return NotImplemented
+        return (self.name, self.utc_epoch_us, self.timezone_id) == (other.name, other.utc_epoch_us, other.timezone_id)
+
+    def __repr__(self) -> str:
+        return f"Event(name={self.name!r}, datetime_start={self.datetime_start!r}, timezone={self.timezone!r})"
+
+
+def benchmark_event_memory(n: int = 100_000) -> Dict[str, float]:
+    """Bytes por evento de los diccionarios de `create_event` frente a `Event`."""
+    start = datetime(2030, 1, 1, 12, 0)
+    results = {}
+    for label, factory in (("dict", create_event), ("Event", Event.create)):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        events = [factory("Event", start + timedelta(minutes=i), "Europe/Madrid") for i in range(n)]
+        results[label] = (tracemalloc.get_traced_memory()[0] - before) / n
+        tracemalloc.stop()
+        del events
+    return results
+
+
+def _epoch_us_or_now(now: Optional[datetime]) -> int:
+    return _now_epoch_us() if now is None else _to_epoch_us(now)
+
+
+class EventIndex:
+    """Índice de eventos ordenado por instante UTC.
+
+    Se apoya en un heap de pares `(utc_epoch_us, event_id)` con borrado perezoso: las entradas de
+    eventos eliminados o ya pasados se descartan cuando llegan a la cima del heap.
+    """
+
+    def __init__(self, events: Iterable[Dict[str, Any]] = ()) -> None:
+        self._events: Dict[int, Dict[str, Any]] = {}
+        self._heap: List[Tuple[int, int]] = []
+        self._next_id = 0
+        for event in events:
+            self._events[self._next_id] = event
+            self._heap.append((_event_epoch_us(event), self._next_id))
+            self._next_id += 1
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._events
+
+    def __getitem__(self, event_id: int) -> Dict[str, Any]:
+        return self._events[event_id]
+
+    def insert(self, event: Dict[str, Any]) -> int:
+        event_id = self._next_id
+        self._next_id += 1
+        self._events[event_id] = event
+        heapq.heappush(self._heap, (_event_epoch_us(event), event_id))
+        return event_id
+
+    def remove(self, event_id: int) -> Optional[Dict[str, Any]]:
+        event = self._events.pop(event_id, None)
+        # Reconstruye el heap cuando las entradas obsoletas superan a las vigentes.
+        if len(self._heap) > 2 * len(self._events) + 64:
+            self._heap = [entry for entry in self._heap if entry[1] in self._events]
+            heapq.heapify(self._heap)
+        return event
+
+    def change_timezone(self, event_id: int, new_timezone_str: str) -> Dict[str, Any]:
+        # El instante UTC no cambia, así que la entrada del heap sigue siendo válida. Un `Event` se
+        # modifica en su sitio; un diccionario se sustituye por su copia.
+        event = self._events[event_id]
+        if isinstance(event, Event):
+            event.change_timezone(new_timezone_str)
+        else:
+            event = self._events[event_id] = change_event_timezone(event, new_timezone_str)
+        return event
+
+    def _evict(self, now_us: int) -> None:
+        heap = self._heap
+        while heap and (heap[0][1] not in self._events or heap[0][0] <= now_us):
+            _, event_id = heapq.heappop(heap)
+            self._events.pop(event_id, None)
+
+    def next_event(self, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        self._evict(_epoch_us_or_now(now))
+        return self._events[self._heap[0][1]] if self._heap else None
+
+    def next_events(self, k: int, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        self._evict(_epoch_us_or_now(now))
+        popped = []
+        while self._heap and len(popped) < k:
+            entry = heapq.heappop(self._heap)
+            if entry[1] in self._events:
+                popped.append(entry)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return [self._events[event_id] for _, event_id in popped]
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Extrae, en orden, los eventos cuyo inicio ya ha llegado."""
+        now_us = _epoch_us_or_now(now)
+        due = []
+        while self._heap and self._heap[0][0] <= now_us:
+            _, event_id = heapq.heappop(self._heap)
+            event = self._events.pop(event_id, None)
+            if event is not None:
+                due.append(event)
+        return due
+
+
+class EventScheduler:
+    """Planificador asyncio que ejecuta los callbacks registrados al inicio de cada evento.
+
+    Todos los eventos comparten un único `EventIndex` y una sola espera hasta el siguiente
+    instante, que se interrumpe cuando se añaden o eliminan eventos. `clock` y `sleep` se pueden
+    inyectar para probarlo con un reloj simulado.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], datetime] = lambda: datetime.now(pytz.UTC),
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> None:
+        self._index = EventIndex()
+        self._callbacks: List[Callable[[Dict[str, Any]], Any]] = []
+        self._clock = clock
+        self._sleep = sleep
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add_callback(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        self._callbacks.append(callback)
+
+    def add_event(self, event: Dict[str, Any]) -> int:
+        event_id = self._index.insert(event)
+        self._wake()
+        return event_id
+
+    def remove_event(self, event_id: int) -> Optional[Dict[str, Any]]:
+        event = self._index.remove(event_id)
+        self._wake()
+        return event
+
+    def stop(self) -> None:
+        self._running = False
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _dispatch(self, event: Dict[str, Any]) -> None:
+        for callback in self._callbacks:
+            result = callback(event)
+            if inspect.isawaitable(result):
+                await result
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        waiter = asyncio.ensure_future(self._wakeup.wait())
+        if timeout is None:
+            await waiter
+            return
+        sleeper = asyncio.ensure_future(self._sleep(timeout))
+        _, pending = await asyncio.wait({waiter, sleeper}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+
+    async def run(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._running = True
+        while self._running:
+            self._wakeup.clear()
+            now = self._clock()
+            due = self._index.pop_due(now)
+            for event in due:
+                await self._dispatch(event)
+            if due:
+                continue
+
+            next_event = self._index.next_event(now)
+            if next_event is None:
+                await self._wait(None)
+            else:
+                await self._wait((_event_epoch_us(next_event) - _to_epoch_us(now)) / 1_000_000)
+        self._wakeup = None
+
+
+def events_to_frame(events: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """Convierte eventos en una tabla columnar: `name`, `utc_ns` (int64) y `timezone` (categórica)."""
+    names, utc_ns, timezones = [], [], []
+    for event in events:
+        names.append(event["name"])
+        utc_ns.append(_event_epoch_us(event) * 1000)
+        timezones.append(event["timezone"])
+    return pd.DataFrame({
+        "name": pd.Series(names, dtype=object),
+        "utc_ns": np.array(utc_ns, dtype="int64"),
+        "timezone": pd.Categorical(timezones),
+    })
+
+
+def load_events(path: Union[str, os.PathLike]) -> pd.DataFrame:
+    """Carga un CSV o Parquet con columnas `name`, `datetime_start` (hora local) y `timezone`."""
+    if str(path).endswith(".parquet"):
+        raw = pd.read_parquet(path)
+    else:
+        raw = pd.read_csv(path)
 
-            timezone = pytz.timezone(event["timezone"])
-            event_utc = timezone.localize(event_datetime).astimezone(pytz.UTC)
+    local = pd.to_datetime(raw["datetime_start"])
+    if local.dt.tz is not None:
+        utc = local.dt.tz_convert("UTC")
+    else:
+        utc = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns, UTC]")
+        # Se localiza una vez por zona horaria; ambiguous=False equivale al is_dst=False de pytz.
+        for timezone_str, positions in raw.groupby("timezone", sort=False).indices.items():
+            localized = local.iloc[positions].dt.tz_localize(
+                timezone_str, ambiguous=False, nonexistent=pd.Timedelta(hours=1)
+            )
+            utc.iloc[positions] = localized.dt.tz_convert("UTC")
+    return pd.DataFrame({
+        "name": raw["name"].astype(object),
+        "utc_ns": ((utc - _EPOCH) // pd.Timedelta(1, "ns")).astype("int64"),
+        "timezone": raw["timezone"].astype("category"),
+    })
+
+
+def frame_to_events(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    events = []
+    for name, utc_ns, timezone_str in zip(frame["name"], frame["utc_ns"], frame["timezone"]):
+        epoch_us = int(utc_ns) // 1000
+        events.append({
+            "name": name,
+            "datetime_start": _from_epoch_us(epoch_us, get_timezone(timezone_str)),
+            "timezone": timezone_str,
+            "utc_epoch_us": epoch_us,
+        })
+    return events
+
+
+def bulk_change_timezone(frame: pd.DataFrame, new_timezone_str: str) -> pd.DataFrame:
+    new_frame = frame.copy()
+    new_frame["timezone"] = pd.Categorical.from_codes(
+        np.zeros(len(frame), dtype="int8"), categories=[new_timezone_str]
+    )
+    return new_frame
+
+
+def bulk_local_datetimes(frame: pd.DataFrame) -> pd.Series:
+    """Hora local de cada fila en su zona horaria, convirtiendo una vez por categoría."""
+    utc = pd.to_datetime(frame["utc_ns"], unit="ns", utc=True)
+    local = pd.Series(index=frame.index, dtype=object)
+    for timezone_str, positions in frame.groupby("timezone", observed=True, sort=False).indices.items():
+        local.iloc[positions] = list(utc.iloc[positions].dt.tz_convert(timezone_str))
+    return local
+
+
+def bulk_time_until_event(frame: pd.DataFrame, now: Optional[datetime] = None) -> pd.Series:
+    now_ns = _epoch_us_or_now(now) * 1000
+    return pd.to_timedelta(frame["utc_ns"] - now_ns, unit="ns")
+
+
+def bulk_find_next_events(frame: pd.DataFrame, k: int = 1, now: Optional[datetime] = None) -> pd.DataFrame:
+    now_ns = _epoch_us_or_now(now) * 1000
+    return frame[frame["utc_ns"] > now_ns].nsmallest(k, "utc_ns")
 
-    time_diff = event_utc - current_utc
-    if time_diff.total_seconds() > 0:
-        if min_time_diff is None or time_diff < min_time_diff:
-            min_time_diff = time_diff
-            next_event = event
-            
-    return next_event
 
 # Para probar el código, descomenta las siguientes líneas
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
+import asyncio
 from datetime import datetime, timedelta
+from itertools import islice
 import pytest
 import pytz
-from ej1a2 import create_event, time_until_event, change_event_timezone, find_next_event  
+from ej1a2 import create_event, time_until_event, change_event_timezone, find_next_event, get_timezone, EventIndex
+from ej1a2 import events_to_frame, load_events, frame_to_events, bulk_change_timezone, bulk_time_until_event
+from ej1a2 import bulk_find_next_events, bulk_local_datetimes, EventScheduler, Event, iter_occurrences, merge_occurrences
 
 
 def test_create_event():
@@ -30,3 +34,176 @@ def test_find_next_event():
     event2 = create_event("Future Event", future_date, "UTC")
     next_event = find_next_event([event1, event2])
     assert next_event is not None and next_event["name"] == "Future Event", "The next event should be 'Future Event'."
+
+def test_create_event_precomputes_utc_epoch():
+    event = create_event("Test Event", datetime(2024, 9, 10, 18, 30), "America/New_York")
+    expected = pytz.timezone("America/New_York").localize(datetime(2024, 9, 10, 18, 30))
+    assert event["utc_epoch_us"] == int(expected.timestamp()) * 1_000_000, "The UTC epoch should be precomputed."
+    assert get_timezone("America/New_York") is get_timezone("America/New_York"), "Timezones should be cached."
+
+def test_change_event_timezone_keeps_instant():
+    event = create_event("Test Event", datetime(2024, 9, 10, 10, 0), "UTC")
+    changed_event = change_event_timezone(event, "America/New_York")
+    assert changed_event["datetime_start"].replace(tzinfo=None) == datetime(2024, 9, 10, 6, 0), \
+        "The local time should be converted to the new timezone."
+    assert changed_event["utc_epoch_us"] == event["utc_epoch_us"], "The UTC instant should not change."
+    assert event["timezone"] == "UTC", "The original event should not be modified."
+
+def test_find_next_event_with_plain_dicts():
+    future = {"name": "Plain Event", "datetime_start": datetime.now() + timedelta(days=2), "timezone": "UTC"}
+    sooner = create_event("Sooner Event", datetime.now() + timedelta(days=1), "UTC")
+    assert find_next_event([future, sooner])["name"] == "Sooner Event", "Dict events without epoch should work."
+
+def test_event_index_next_events():
+    now = datetime.now(pytz.UTC)
+    index = EventIndex([create_event("Past", datetime.now() - timedelta(hours=1), "UTC")])
+    third = index.insert(create_event("Third", datetime.now() + timedelta(days=3), "Europe/Madrid"))
+    first = index.insert(create_event("First", datetime.now() + timedelta(days=1), "UTC"))
+    second = index.insert(create_event("Second", datetime.now() + timedelta(days=2), "America/New_York"))
+    assert index.next_event(now)["name"] == "First", "The earliest future event should come first."
+    assert len(index) == 3, "Past events should be evicted lazily."
+    assert [event["name"] for event in index.next_events(2, now)] == ["First", "Second"]
+
+    index.remove(first)
+    changed = index.change_timezone(second, "Asia/Tokyo")
+    assert changed["timezone"] == "Asia/Tokyo", "The event timezone should be updated in the index."
+    assert [event["name"] for event in index.next_events(5, now)] == ["Second", "Third"]
+    assert index.next_event(now + timedelta(days=4)) is None, "No events should remain in the future."
+    assert third not in index, "Expired events should be evicted from the index."
+
+def test_bulk_operations_match_scalar_functions(tmp_path):
+    now = datetime.now(pytz.UTC)
+    events = [
+        create_event("Past", datetime(2023, 3, 26, 1, 30), "Europe/Madrid"),
+        create_event("Later", datetime.now() + timedelta(days=3), "America/New_York"),
+        create_event("Soon", datetime.now() + timedelta(days=1), "Asia/Tokyo"),
+        create_event("DST", datetime(2030, 11, 3, 1, 30), "America/New_York"),
+    ]
+    frame = events_to_frame(events)
+    assert list(frame["utc_ns"]) == [event["utc_epoch_us"] * 1000 for event in events]
+
+    changed = frame_to_events(bulk_change_timezone(frame, "Europe/London"))
+    assert changed == [change_event_timezone(event, "Europe/London") for event in events], \
+        "Bulk timezone conversion should match change_event_timezone."
+
+    elapsed = now - datetime(1970, 1, 1, tzinfo=pytz.UTC)
+    assert list(bulk_time_until_event(frame, now)) == [
+        timedelta(microseconds=event["utc_epoch_us"]) - elapsed for event in events
+    ], "Bulk time until event should match the scalar computation."
+    # Se comparan instante y desfase: las horas ambiguas de distintas tzinfo nunca son iguales con ==.
+    assert [(value.timestamp(), value.utcoffset()) for value in bulk_local_datetimes(frame)] == [
+        (event["datetime_start"].timestamp(), event["datetime_start"].utcoffset()) for event in events
+    ], "Bulk local datetimes should match the scalar localization."
+    assert list(bulk_find_next_events(frame, 2, now)["name"]) == ["Soon", "Later"]
+
+    csv_path = tmp_path / "events.csv"
+    csv_path.write_text(
+        "name,datetime_start,timezone\n"
+        "Past,2023-03-26 01:30:00,Europe/Madrid\n"
+        "DST,2030-11-03 01:30:00,America/New_York\n"
+    )
+    loaded = load_events(csv_path)
+    assert list(loaded["utc_ns"]) == [events[0]["utc_epoch_us"] * 1000, events[3]["utc_epoch_us"] * 1000], \
+        "Loaded local times should be localized like create_event."
+
+class FakeClock:
+    """Reloj simulado: las esperas solo terminan cuando el test avanza el tiempo."""
+
+    def __init__(self, start: datetime) -> None:
+        self.current = start
+        self.timers = []
+
+    def now(self) -> datetime:
+        return self.current
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self.timers.append((self.current + timedelta(seconds=seconds), future))
+        await future
+
+    async def advance(self) -> None:
+        for _ in range(10):
+            await asyncio.sleep(0)
+        self.timers = [(deadline, future) for deadline, future in self.timers if not future.done()]
+        if self.timers:
+            deadline, future = min(self.timers, key=lambda timer: timer[0])
+            self.current = max(self.current, deadline)
+            future.set_result(None)
+
+def test_event_scheduler_with_fake_clock():
+    start = pytz.UTC.localize(datetime(2030, 1, 1, 12, 0))
+    clock = FakeClock(start)
+    scheduler = EventScheduler(clock=clock.now, sleep=clock.sleep)
+    fired = []
+
+    async def on_event(event):
+        fired.append((event["name"], clock.current - start))
+        if event["name"] == "Last":
+            scheduler.stop()
+
+    scheduler.add_callback(on_event)
+    scheduler.add_event(create_event("Last", datetime(2030, 1, 1, 12, 10), "UTC"))
+    removed = scheduler.add_event(create_event("Removed", datetime(2030, 1, 1, 13, 5), "Europe/Madrid"))
+
+    async def main():
+        task = asyncio.ensure_future(scheduler.run())
+        await asyncio.sleep(0)
+        scheduler.remove_event(removed)
+        scheduler.add_event(create_event("First", datetime(2030, 1, 1, 7, 1), "America/New_York"))
+        while not task.done():
+            await clock.advance()
+
+    asyncio.run(main())
+    assert fired == [("First", timedelta(minutes=1)), ("Last", timedelta(minutes=10))], \
+        "Callbacks should fire exactly at each event start, in order."
+    assert len(scheduler) == 0, "Fired events should leave the scheduler."
+
+def test_compact_event_matches_dict_event():
+    event_dict = create_event("Global Meeting", datetime(2024, 9, 10, 10, 0), "UTC")
+    event = Event.create("Global Meeting", datetime(2024, 9, 10, 10, 0), "UTC")
+    assert event == Event.from_dict(event_dict), "Both constructors should build the same compact event."
+    assert event.to_dict() == event_dict, "The compact event should convert back to the dict format."
+    assert not hasattr(event, "__dict__"), "Compact events should not carry a per-instance dict."
+
+    changed = change_event_timezone(event, "America/New_York")
+    assert isinstance(changed, Event) and changed.timezone == "America/New_York"
+    assert changed["datetime_start"] == change_event_timezone(event_dict, "America/New_York")["datetime_start"]
+    assert event.timezone == "UTC", "change_event_timezone should not modify the original event."
+
+    event.change_timezone("Asia/Tokyo")
+    assert event.utc_epoch_us == event_dict["utc_epoch_us"], "Changing timezone in place keeps the instant."
+
+def test_dict_functions_accept_compact_events():
+    past = Event.create("Past", datetime.now() - timedelta(days=1), "UTC")
+    future = Event.create("Future", datetime.now() + timedelta(days=1), "Europe/Madrid")
+    assert time_until_event(future) > timedelta(), "time_until_event should accept compact events."
+    assert find_next_event([past, future]) is future, "find_next_event should accept compact events."
+    assert EventIndex([past, future]).next_event() is future, "EventIndex should accept compact events."
+
+    index = EventIndex()
+    event_id = index.insert(future)
+    assert index.change_timezone(event_id, "Asia/Tokyo") is future, "Compact events should change in place."
+    assert future.timezone == "Asia/Tokyo" and index.next_event() is future
+
+def test_recurring_event_keeps_wall_clock_across_dst():
+    event = create_event("Standup", datetime(2030, 3, 29, 9, 0), "Europe/Madrid", recurrence="daily")
+    occurrences = list(islice(iter_occurrences(event), 4))
+    assert [occurrence["datetime_start"].hour for occurrence in occurrences] == [9, 9, 9, 9], \
+        "Occurrences should keep the local wall-clock time."
+    assert [occurrence["datetime_start"].astimezone(pytz.UTC).hour for occurrence in occurrences] == [8, 8, 7, 7], \
+        "The UTC instant should move with the DST transition."
+    after = pytz.UTC.localize(datetime(2030, 3, 31, 7, 0))
+    assert next(iter_occurrences(event, after))["datetime_start"].day == 1, "Occurrences should start after 'after'."
+
+def test_merge_occurrences_and_find_next_recurring_event():
+    daily = create_event("Daily", datetime(2030, 1, 1, 10, 0), "UTC", recurrence="daily")
+    weekly = create_event("Weekly", datetime(2030, 1, 2, 9, 0), "America/New_York", recurrence="weekly")
+    single = create_event("Single", datetime(2030, 1, 3, 12, 0), "UTC")
+    merged = islice(merge_occurrences([weekly, daily, single]), 6)
+    merged = [(event["name"], event["datetime_start"].day) for event in merged]
+    assert merged == [("Daily", 1), ("Daily", 2), ("Weekly", 2), ("Daily", 3), ("Single", 3), ("Daily", 4)]
+
+    started = create_event("Started", datetime.now() - timedelta(days=10, hours=1), "Europe/Madrid", recurrence="daily")
+    next_event = find_next_event([started, create_event("Later", datetime.now() + timedelta(days=2), "UTC")])
+    assert next_event["name"] == "Started", "The next occurrence of a running series should be found."
+    assert timedelta() < time_until_event(next_event) <= timedelta(days=1)
@@ -70,7 +70,17 @@ Salida esperada:
 
 
 from collections import namedtuple, defaultdict, Counter
-from typing import Tuple, Dict, List, Type
+from collections.abc import Sequence
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, TextIO, Tuple, Type, Union
+import csv
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 
 def define_types() -> Tuple[Type[namedtuple], Type[namedtuple]]:
@@ -79,22 +89,202 @@ def define_types() -> Tuple[Type[namedtuple], Type[namedtuple]]:
     return Book, User
 
 
-def register_loan(loans: dict[Type[namedtuple], list[Type[namedtuple]]], popularity: Counter, user: Type[namedtuple], book: Type[namedtuple]) -> bool:
-    if book in loan[user]:
+class IdentityRegistry:
+    """Identidades internadas: asigna a cada Book/User un id entero denso según su clave (ISBN, email).
+
+    Los atributos se guardan por columnas, una lista por campo, y cada registro se almacena una
+    sola vez. Los préstamos y la popularidad pueden usar los ids como claves, que se comparan y
+    se hashean más rápido que las tuplas completas; `registry[id]` reconstruye la tupla original.
+    """
+
+    def __init__(self, record_type: Type[namedtuple], key_field: str) -> None:
+        self.record_type = record_type
+        self.key_field = key_field
+        self._key_position = record_type._fields.index(key_field)
+        self._columns: List[List[str]] = [[] for _ in record_type._fields]
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, record: Iterable[str]) -> int:
+        """Devuelve el id de `record` (una tupla del tipo o sus valores en orden), registrándolo si es nuevo."""
+        values = tuple(record)
+        key = values[self._key_position]
+        record_id = self._ids.get(key)
+        if record_id is None:
+            record_id = self._ids[key] = len(self._ids)
+            for column, value in zip(self._columns, values):
+                column.append(value)
+        return record_id
+
+    def id_of(self, key: str) -> Optional[int]:
+        return self._ids.get(key)
+
+    def attribute(self, record_id: int, field: str) -> str:
+        return self._columns[self.record_type._fields.index(field)][record_id]
+
+    def resolve(self, counts: Iterable[Tuple[int, int]]) -> List[Tuple[Any, int]]:
+        """Convierte pares `(id, recuento)`, como los de `most_popular_books`, en pares con la tupla."""
+        return [(self[record_id], count) for record_id, count in counts]
+
+    def __getitem__(self, record_id: int) -> Any:
+        return self.record_type(*(column[record_id] for column in self._columns))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def define_registries(book_type: Type[namedtuple], user_type: Type[namedtuple]) -> Tuple[IdentityRegistry, IdentityRegistry]:
+    return IdentityRegistry(book_type, "isbn"), IdentityRegistry(user_type, "email")
+
+
+class LoanView(Sequence):
+    """Vista de solo lectura de los libros prestados a un usuario, en orden de préstamo.
+
+    `book in view` es O(1) y no copia nada; la vista refleja los cambios posteriores del almacén.
+    Para modificar los préstamos hay que usar `register_loan`/`register_return`.
+    """
+
+    __slots__ = ("_books",)
+    __hash__ = None
+
+    def __init__(self, books: Dict[Any, None]) -> None:
+        self._books = books
+
+    def __getitem__(self, index: Any) -> Any:
+        return list(self._books)[index]
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._books)
+
+    def __contains__(self, book: Any) -> bool:
+        return book in self._books
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LoanView({list(self._books)!r})"
+
+    def append(self, book: Any) -> None:
+        raise TypeError("LoanStore views are read-only: use register_loan")
+
+    def remove(self, book: Any) -> None:
+        raise TypeError("LoanStore views are read-only: use register_return")
+
+
+class LoanStore:
+    """Préstamos por usuario guardados como conjuntos ordenados, con un índice inverso ISBN -> usuarios.
+
+    Las comprobaciones de préstamo y devolución son O(1) esperado. Se comporta como el
+    `defaultdict(list)` original en lectura (`loans[user]`, `items()`), así que el código que recorre
+    los préstamos sigue funcionando, y `register_loan`/`register_return` lo aceptan directamente.
+    `loans[user]` devuelve una `LoanView` de solo lectura: `loans[user].append(...)` y `.remove(...)`
+    lanzan `TypeError` en vez de perderse en una copia.
+    Si se indica el registro `books`, los libros son ids de ese `IdentityRegistry`.
+    """
+
+    def __init__(self, loans: Optional[Mapping[Any, Iterable[Any]]] = None,
+                 books: Optional[IdentityRegistry] = None) -> None:
+        self.books = books
+        self._loans: Dict[Any, Dict[Any, None]] = {}
+        self._holders: Dict[Any, Dict[Any, None]] = {}
+        for user, books in (loans or {}).items():
+            for book in books:
+                self.register_loan(user, book)
+
+    def register_loan(self, user: Any, book: Any) -> bool:
+        books = self._loans.setdefault(user, {})
+        if book in books:
+            return False
+        books[book] = None
+        self._holders.setdefault(self._holder_key(book), {})[user] = None
+        return True
+
+    def register_return(self, user: Any, book: Any) -> bool:
+        books = self._loans.get(user)
+        if books is None or book not in books:
+            return False
+        del books[book]
+        key = self._holder_key(book)
+        holders = self._holders[key]
+        del holders[user]
+        if not holders:
+            del self._holders[key]
+        return True
+
+    def _holder_key(self, book: Any) -> Any:
+        return book if self.books is not None else book.isbn
+
+    def holders(self, isbn: str) -> List[Any]:
+        key = self.books.id_of(isbn) if self.books is not None else isbn
+        return list(self._holders.get(key, ()))
+
+    def has_loan(self, user: Any, book: Any) -> bool:
+        return book in self._loans.get(user, ())
+
+    def to_loans(self) -> Dict[Any, List[Any]]:
+        loans = defaultdict(list)
+        for user, books in self._loans.items():
+            loans[user].extend(books)
+        return loans
+
+    def __getitem__(self, user: Any) -> LoanView:
+        return LoanView(self._loans.get(user, {}))
+
+    def __contains__(self, user: Any) -> bool:
+        return user in self._loans
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._loans)
+
+    def __len__(self) -> int:
+        return len(self._loans)
+
+    def items(self) -> Iterator[Tuple[Any, LoanView]]:
+        return ((user, LoanView(books)) for user, books in self._loans.items())
+
+
+def _add_loan(loans: Any, user: Any, book: Any) -> bool:
+    if isinstance(loans, LoanStore):
+        return loans.register_loan(user, book)
+
+    if book in loans[user]:
         return False
 
     loans[user].append(book)
-    popularity[book] += 1
     return True
 
 
-def register_return(loans: dict[Type[namedtuple], list[Type[namedtuple]]], user: Type[namedtuple], book: Type[namedtuple]) -> bool:
-    if book in loans[user]:
-        loans[user].remove(book)
-        return True
+def register_loan(loans: dict[Type[namedtuple], list[Type[namedtuple]]], popularity: Counter, user: Type[namedtuple], book: Type[namedtuple], *, windows: Iterable["WindowedPopularity"] = (), journal: Optional["LoanJournal"] = None) -> bool:
+    if journal is not None:
+        journal.append(LOAN_RECORD, user, book)
+    # La popularidad cuenta cada solicitud de préstamo, también las de un libro que el usuario ya tiene.
+    popularity[book] += 1
+    for window in windows:
+        window.record(book)
+    accepted = _add_loan(loans, user, book)
+    if journal is not None:
+        journal.checkpoint()
+    return accepted
 
+
+def register_return(loans: dict[Type[namedtuple], list[Type[namedtuple]]], user: Type[namedtuple], book: Type[namedtuple], *, journal: Optional["LoanJournal"] = None) -> bool:
+    if journal is not None:
+        journal.append(RETURN_RECORD, user, book)
+    if isinstance(loans, LoanStore):
+        returned = loans.register_return(user, book)
+    elif book in loans[user]:
+        loans[user].remove(book)
+        returned = True
     else:
-        return False
+        returned = False
+    if journal is not None:
+        journal.checkpoint()
+    return returned
 
 
 def most_popular_books(popularity: Counter, N: int = 3) -> List[Tuple[namedtuple, int]]:
@@ -102,6 +292,527 @@ def most_popular_books(popularity: Counter, N: int = 3) -> List[Tuple[namedtuple
     result = [(book, count) for book, count in most_common if count > 0]
     return result
 
+
+class _Bucket:
+    __slots__ = ("count", "items", "prev", "next")
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.items: Dict[Any, None] = {}
+        self.prev: Optional["_Bucket"] = None
+        self.next: Optional["_Bucket"] = None
+
+
+class PopularityTracker:
+    """Ranking de popularidad mantenido de forma incremental (estructura Stream-Summary).
+
+    Los libros se agrupan en cubetas por número de préstamos, enlazadas en orden creciente: cada
+    incremento mueve el libro a la cubeta contigua en O(1) y el top-N se lee desde la cubeta más
+    alta en O(N). Con `capacity=None` los recuentos son exactos; con una capacidad se aplica
+    Space-Saving y solo se vigilan `capacity` libros, con recuentos que pueden sobrestimar como
+    mucho `error(book)`.
+
+    Implementa la parte de la interfaz de `Counter` que usan `register_loan`, `most_popular_books`,
+    `ingest_loans_csv` y `LoanJournal.recover` (`popularity[book] += n`, asignar un recuento mayor,
+    `update`, `most_common`), así que puede sustituirlo; los recuentos no pueden disminuir.
+    """
+
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        if capacity is not None and capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._bucket_of: Dict[Any, _Bucket] = {}
+        self._errors: Dict[Any, int] = {}
+        self._lowest: Optional[_Bucket] = None
+        self._highest: Optional[_Bucket] = None
+
+    def _link_after(self, bucket: _Bucket, previous: Optional[_Bucket]) -> None:
+        bucket.prev = previous
+        bucket.next = previous.next if previous is not None else self._lowest
+        if bucket.next is not None:
+            bucket.next.prev = bucket
+        else:
+            self._highest = bucket
+        if previous is not None:
+            previous.next = bucket
+        else:
+            self._lowest = bucket
+
+    def _unlink(self, bucket: _Bucket) -> None:
+        if bucket.prev is not None:
+            bucket.prev.next = bucket.next
+        else:
+            self._lowest = bucket.next
+        if bucket.next is not None:
+            bucket.next.prev = bucket.prev
+        else:
+            self._highest = bucket.prev
+
+    def increment(self, item: Any) -> int:
+        return self.add(item, 1)
+
+    def add(self, item: Any, count: int) -> int:
+        """Suma `count` préstamos a `item` y devuelve su nuevo recuento.
+
+        El libro salta a la cubeta de su nuevo recuento recorriendo las cubetas intermedias, así
+        que un incremento de uno sigue siendo O(1).
+        """
+        if count < 0:
+            raise ValueError("PopularityTracker counts can only grow")
+        bucket = self._bucket_of.get(item)
+        if bucket is None and self.capacity is not None and len(self._bucket_of) >= self.capacity:
+            # Space-Saving: el nuevo libro sustituye al de menor recuento y hereda ese recuento.
+            bucket = self._lowest
+            victim = next(iter(bucket.items))
+            del bucket.items[victim]
+            del self._bucket_of[victim]
+            self._errors.pop(victim, None)
+            self._errors[item] = bucket.count
+            bucket.items[item] = None
+            self._bucket_of[item] = bucket
+        if count == 0:
+            return 0 if bucket is None else bucket.count
+
+        total = count if bucket is None else bucket.count + count
+        previous = bucket
+        following = self._lowest if previous is None else previous.next
+        while following is not None and following.count < total:
+            previous, following = following, following.next
+        if following is None or following.count != total:
+            following = _Bucket(total)
+            self._link_after(following, previous)
+        if bucket is not None:
+            del bucket.items[item]
+            if not bucket.items:
+                self._unlink(bucket)
+        following.items[item] = None
+        self._bucket_of[item] = following
+        return total
+
+    def update(self, counts: Any = ()) -> None:
+        """Como `Counter.update`: suma los recuentos de un mapping o uno por elemento de un iterable."""
+        if hasattr(counts, "items"):
+            for item, count in counts.items():
+                self.add(item, count)
+        else:
+            for item in counts:
+                self.add(item, 1)
+
+    def error(self, item: Any) -> int:
+        return self._errors.get(item, 0)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Any, int]]:
+        result = []
+        bucket = self._highest
+        while bucket is not None and (n is None or len(result) < n):
+            for item in bucket.items:
+                if n is not None and len(result) == n:
+                    break
+                result.append((item, bucket.count))
+            bucket = bucket.prev
+        return result
+
+    def __getitem__(self, item: Any) -> int:
+        bucket = self._bucket_of.get(item)
+        return 0 if bucket is None else bucket.count
+
+    def __setitem__(self, item: Any, count: int) -> None:
+        current = self[item]
+        if count < current:
+            raise ValueError("PopularityTracker counts can only grow")
+        self.add(item, count - current)
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._bucket_of
+
+    def __len__(self) -> int:
+        return len(self._bucket_of)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._bucket_of)
+
+    def values(self) -> Iterator[int]:
+        return (bucket.count for bucket in self._bucket_of.values())
+
+    def items(self) -> Iterator[Tuple[Any, int]]:
+        return ((item, bucket.count) for item, bucket in self._bucket_of.items())
+
+
+def ingest_loans_csv(source: Union[str, os.PathLike, TextIO], loans: Any, popularity: Counter,
+                     book_type: Type[namedtuple], user_type: Type[namedtuple], chunk_size: int = 10_000,
+                     journal: Optional["LoanJournal"] = None, books: Optional[IdentityRegistry] = None,
+                     users: Optional[IdentityRegistry] = None) -> Tuple[int, int]:
+    """Importa préstamos y devoluciones desde un CSV por bloques de `chunk_size` filas.
+
+    El CSV tiene las columnas `action` (`loan` o `return`), `name`, `email`, `title`, `author` e
+    `isbn`. Usuarios y libros se internan por email e ISBN para construir cada tupla una sola vez,
+    y la popularidad de cada bloque se acumula aparte y se vuelca con un único `Counter.update`. El
+    resultado es el mismo que llamar a `register_loan`/`register_return` fila a fila. Devuelve el
+    número de préstamos y devoluciones aceptados. Con los registros `books`/`users` los préstamos y
+    la popularidad se indexan por sus ids.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8") as file:
+            return ingest_loans_csv(file, loans, popularity, book_type, user_type, chunk_size, journal, books, users)
+    if journal is not None and (books is not None or users is not None):
+        raise ValueError("The journal stores full records and cannot be combined with id registries")
+    make_book = book_type if books is None else lambda *values: books.intern(values)
+    make_user = user_type if users is None else lambda *values: users.intern(values)
+
+    rows = csv.reader(source)
+    header = next(rows, None)
+    if header is None:
+        return 0, 0
+    columns = [header.index(column) for column in ("action", "name", "email", "title", "author", "isbn")]
+    action_at, name_at, email_at, title_at, author_at, isbn_at = columns
+
+    users_by_email: Dict[str, Any] = {}
+    books_by_isbn: Dict[str, Any] = {}
+    accepted_loans = accepted_returns = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        chunk_popularity = Counter()
+        try:
+            for row in chunk:
+                user = users_by_email.get(row[email_at])
+                if user is None:
+                    user = users_by_email[row[email_at]] = make_user(row[name_at], row[email_at])
+                book = books_by_isbn.get(row[isbn_at])
+                if book is None:
+                    book = books_by_isbn[row[isbn_at]] = make_book(row[title_at], row[author_at], row[isbn_at])
+
+                if row[action_at] == "loan":
+                    if journal is not None:
+                        journal.append(LOAN_RECORD, user, book)
+                    chunk_popularity[book] += 1
+                    accepted_loans += _add_loan(loans, user, book)
+                elif row[action_at] == "return":
+                    if journal is not None:
+                        journal.append(RETURN_RECORD, user, book)
+                    accepted_returns += register_return(loans, user, book)
+                else:
+                    raise ValueError(f"Unknown action {row[action_at]!r}")
+        finally:
+            # Si una fila falla, las anteriores ya están aplicadas: su popularidad también.
+            popularity.update(chunk_popularity)
+        # La instantánea automática solo puede tomarse con el bloque entero aplicado.
+        if journal is not None:
+            journal.checkpoint()
+    return accepted_loans, accepted_returns
+
+
+# Ventanas de tendencias: (duración en segundos, número de cubetas).
+TRENDING_WINDOWS = {"hour": (3600, 60), "day": (86400, 96), "week": (604800, 168)}
+
+
+class WindowedPopularity:
+    """Popularidad de los libros en una ventana deslizante de `window` segundos.
+
+    Los préstamos se acumulan en un anillo de `buckets` contadores, uno por intervalo de tiempo,
+    junto con el total de la ventana. Al avanzar el reloj se restan del total las cubetas que
+    caducan, así que cada préstamo se suma y se resta una sola vez y la memoria depende del número
+    de cubetas, no del de préstamos.
+    """
+
+    def __init__(self, window: float, buckets: int = 60, clock: Callable[[], float] = time.time) -> None:
+        if window <= 0 or buckets <= 0:
+            raise ValueError("window and buckets must be positive")
+        self.window = window
+        self.bucket_width = window / buckets
+        self._buckets: List[Counter] = [Counter() for _ in range(buckets)]
+        self._totals: Counter = Counter()
+        self._current: Optional[int] = None
+        self._clock = clock
+
+    def _advance(self, now: Optional[float]) -> Counter:
+        slot = int((self._clock() if now is None else now) // self.bucket_width)
+        if self._current is None:
+            self._current = slot
+        elif slot > self._current:
+            for absolute in range(self._current + 1, min(slot, self._current + len(self._buckets)) + 1):
+                bucket = self._buckets[absolute % len(self._buckets)]
+                for book, count in bucket.items():
+                    remaining = self._totals[book] - count
+                    if remaining:
+                        self._totals[book] = remaining
+                    else:
+                        del self._totals[book]
+                bucket.clear()
+            self._current = slot
+        return self._buckets[self._current % len(self._buckets)]
+
+    def record(self, book: Any, now: Optional[float] = None) -> None:
+        self._advance(now)[book] += 1
+        self._totals[book] += 1
+
+    def count(self, book: Any, now: Optional[float] = None) -> int:
+        self._advance(now)
+        return self._totals[book]
+
+    def most_common(self, n: Optional[int] = None, now: Optional[float] = None) -> List[Tuple[Any, int]]:
+        self._advance(now)
+        return self._totals.most_common(n)
+
+
+def trending_windows(clock: Callable[[], float] = time.time) -> Dict[str, WindowedPopularity]:
+    return {name: WindowedPopularity(window, buckets, clock) for name, (window, buckets) in TRENDING_WINDOWS.items()}
+
+
+class ConcurrentLoanDesk:
+    """Gestión de préstamos segura entre hilos con bloqueo por franjas de usuarios.
+
+    Cada usuario pertenece a una de `shards` franjas, con su propio lock, `LoanStore` y `Counter`,
+    así que las operaciones de un mismo usuario se serializan (son linealizables) mientras que las
+    de usuarios de franjas distintas no compiten por el mismo lock. Las consultas globales
+    combinan las franjas bloqueándolas de una en una.
+    """
+
+    def __init__(self, shards: int = 16, books: Optional[IdentityRegistry] = None) -> None:
+        if shards <= 0:
+            raise ValueError("shards must be positive")
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._stores = [LoanStore(books=books) for _ in range(shards)]
+        self._popularity = [Counter() for _ in range(shards)]
+
+    def _shard(self, user: Any) -> int:
+        return hash(user) % len(self._locks)
+
+    def register_loan(self, user: Any, book: Any) -> bool:
+        shard = self._shard(user)
+        with self._locks[shard]:
+            return register_loan(self._stores[shard], self._popularity[shard], user, book)
+
+    def register_return(self, user: Any, book: Any) -> bool:
+        shard = self._shard(user)
+        with self._locks[shard]:
+            return register_return(self._stores[shard], user, book)
+
+    def loans_of(self, user: Any) -> List[Any]:
+        shard = self._shard(user)
+        with self._locks[shard]:
+            return self._stores[shard][user]
+
+    def holders(self, isbn: str) -> List[Any]:
+        holders = []
+        for lock, store in zip(self._locks, self._stores):
+            with lock:
+                holders.extend(store.holders(isbn))
+        return holders
+
+    def popularity(self) -> Counter:
+        merged = Counter()
+        for lock, popularity in zip(self._locks, self._popularity):
+            with lock:
+                merged.update(popularity)
+        return merged
+
+    def most_popular_books(self, N: int = 3) -> List[Tuple[Any, int]]:
+        return most_popular_books(self.popularity(), N)
+
+
+def benchmark_loan_desk(threads: int = 8, operations: int = 200_000, shards: int = 16) -> Dict[str, float]:
+    """Operaciones por segundo con un único lock global frente al bloqueo por franjas."""
+    Book, User = define_types()
+    users = [User(name=f"User {i}", email=f"user{i}@example.com") for i in range(1_000)]
+    books = [Book(title=f"Book {i}", author="Author", isbn=str(i)) for i in range(500)]
+
+    def work(desk: ConcurrentLoanDesk, worker: int) -> None:
+        for i in range(worker, operations, threads):
+            user, book = users[i % len(users)], books[i % len(books)]
+            if not desk.register_loan(user, book):
+                desk.register_return(user, book)
+
+    results = {}
+    for label, shard_count in (("global_lock", 1), ("sharded", shards)):
+        desk = ConcurrentLoanDesk(shard_count)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(work, [desk] * threads, range(threads)))
+        results[label] = operations / (time.perf_counter() - start)
+    return results
+
+
+LOAN_RECORD = 1
+RETURN_RECORD = 2
+_WAL_HEADER = struct.Struct("<4sQ")
+_RECORD_HEADER = struct.Struct("<BI")
+_FIELD_LENGTH = struct.Struct("<H")
+_CRC = struct.Struct("<I")
+_WAL_MAGIC = b"LWAL"
+
+
+class LoanJournal:
+    """Persistencia de préstamos: registro binario de solo escritura al final (WAL) más instantáneas.
+
+    Cada llamada a `register_loan`/`register_return` con `journal=` añade un registro
+    `tipo, longitud, campos, crc32` y el fichero se sincroniza con `fsync` cada `sync_every`
+    registros. `snapshot` guarda el estado completo y reinicia el registro con una nueva generación;
+    `recover` carga la última instantánea y reproduce solo los registros de esa generación,
+    descartando un registro final incompleto.
+
+    Con `snapshot_every`, la instantánea se toma sola cuando el registro acumula ese número de
+    registros: `register_loan`, `register_return` e `ingest_loans_csv` llaman a `checkpoint` tras
+    aplicar cada cambio, y se guarda el estado devuelto por `recover`. Sin él, llamar a `snapshot`
+    es responsabilidad de quien usa el diario, y el registro crece sin límite.
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike], book_type: Type[namedtuple],
+                 user_type: Type[namedtuple], sync_every: int = 64, snapshot_every: Optional[int] = None) -> None:
+        if snapshot_every is not None and snapshot_every <= 0:
+            raise ValueError("snapshot_every must be positive")
+        self.wal_path = os.path.join(directory, "loans.wal")
+        self.snapshot_path = os.path.join(directory, "loans.snapshot")
+        self.book_type = book_type
+        self.user_type = user_type
+        self.sync_every = sync_every
+        self.snapshot_every = snapshot_every
+        self.generation = 0
+        self._file = None
+        self._pending = 0
+        self._logged = 0
+        self._state: Optional[Tuple[Any, Counter]] = None
+
+    def _encode(self, kind: int, user: Any, book: Any) -> bytes:
+        payload = bytearray()
+        for field in (*user, *book):
+            data = field.encode("utf-8")
+            payload += _FIELD_LENGTH.pack(len(data)) + data
+        record = _RECORD_HEADER.pack(kind, len(payload)) + payload
+        return record + _CRC.pack(zlib.crc32(record))
+
+    def _decode(self, payload: bytes) -> Tuple[Any, Any]:
+        fields, offset = [], 0
+        while offset < len(payload):
+            (length,) = _FIELD_LENGTH.unpack_from(payload, offset)
+            offset += _FIELD_LENGTH.size
+            fields.append(payload[offset:offset + length].decode("utf-8"))
+            offset += length
+        split = len(self.user_type._fields)
+        return self.user_type(*fields[:split]), self.book_type(*fields[split:])
+
+    def _reset_wal(self, generation: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        with open(self.wal_path, "wb") as file:
+            file.write(_WAL_HEADER.pack(_WAL_MAGIC, generation))
+            file.flush()
+            os.fsync(file.fileno())
+        self.generation = generation
+        self._file = open(self.wal_path, "ab")
+        self._pending = 0
+        self._logged = 0
+
+    def _replay(self, loans: Any, popularity: Counter) -> None:
+        with open(self.wal_path, "rb") as file:
+            data = file.read()
+        offset = _WAL_HEADER.size
+        while offset + _RECORD_HEADER.size <= len(data):
+            kind, length = _RECORD_HEADER.unpack_from(data, offset)
+            end = offset + _RECORD_HEADER.size + length
+            if end + _CRC.size > len(data):
+                break
+            (crc,) = _CRC.unpack_from(data, end)
+            if crc != zlib.crc32(data[offset:end]):
+                break
+            user, book = self._decode(data[offset + _RECORD_HEADER.size:end])
+            if kind == LOAN_RECORD:
+                register_loan(loans, popularity, user, book)
+            else:
+                register_return(loans, user, book)
+            self._logged += 1
+            offset = end + _CRC.size
+        if offset < len(data):
+            # Registro incompleto o corrupto tras una caída: se descarta para poder seguir escribiendo.
+            with open(self.wal_path, "r+b") as file:
+                file.truncate(offset)
+
+    def recover(self, loans: Any = None, popularity: Optional[Counter] = None) -> Tuple[Any, Counter]:
+        loans = defaultdict(list) if loans is None else loans
+        popularity = Counter() if popularity is None else popularity
+        generation = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as file:
+                state = json.load(file)
+            generation = state["generation"]
+            for user_fields, books in state["loans"]:
+                user = self.user_type(*user_fields)
+                for book_fields in books:
+                    _add_loan(loans, user, self.book_type(*book_fields))
+            for book_fields, count in state["popularity"]:
+                popularity[self.book_type(*book_fields)] = count
+
+        wal_generation = None
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, "rb") as file:
+                header = file.read(_WAL_HEADER.size)
+            if len(header) == _WAL_HEADER.size:
+                magic, wal_generation = _WAL_HEADER.unpack(header)
+                if magic != _WAL_MAGIC:
+                    raise ValueError(f"{self.wal_path} is not a loan journal")
+
+        self._state = (loans, popularity)
+        if wal_generation == generation:
+            self._logged = 0
+            self._replay(loans, popularity)
+            self.generation = generation
+            self._file = open(self.wal_path, "ab")
+        else:
+            # Sin registro, o registro anterior a la instantánea: ya está incluido en ella.
+            self._reset_wal(generation)
+        return loans, popularity
+
+    def append(self, kind: int, user: Any, book: Any) -> None:
+        if self._file is None:
+            raise RuntimeError("LoanJournal.recover() must be called before appending")
+        self._file.write(self._encode(kind, user, book))
+        self._pending += 1
+        self._logged += 1
+        if self._pending >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def checkpoint(self) -> bool:
+        """Toma la instantánea si el registro ya tiene `snapshot_every` registros; indica si la ha tomado."""
+        if self.snapshot_every is None or self._state is None or self._logged < self.snapshot_every:
+            return False
+        self.snapshot(*self._state)
+        return True
+
+    def snapshot(self, loans: Any, popularity: Counter) -> None:
+        self.sync()
+        state = {
+            "generation": self.generation + 1,
+            "loans": [[list(user), [list(book) for book in books]] for user, books in loans.items() if books],
+            "popularity": [[list(book), count] for book, count in popularity.items()],
+        }
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+        self._reset_wal(state["generation"])
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "LoanJournal":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
 # Para probar el código, descomenta las siguientes líneas
 if __name__ == "__main__":
     # Definir los tipos
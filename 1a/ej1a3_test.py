@@ -1,6 +1,9 @@
 import pytest
+import threading
 from collections import namedtuple, defaultdict, Counter
-from ej1a3 import define_types, register_loan, register_return, most_popular_books
+from ej1a3 import define_types, register_loan, register_return, most_popular_books, LoanStore, PopularityTracker
+from ej1a3 import WindowedPopularity, trending_windows, LoanJournal, ingest_loans_csv, define_registries
+from ej1a3 import ConcurrentLoanDesk
 
 Book, User = define_types()
 
@@ -37,3 +40,233 @@ def test_most_popular_books(setup_library):
     popular_books = most_popular_books(popularity, 1)
     assert popular_books[0][0] == book1, "The most popular book should be 'Python for Beginners'"
     assert popular_books[0][1] == 2, "'Python for Beginners' should have been loaned out twice"
+
+def test_loan_store_holders_and_adapter():
+    store = LoanStore()
+    popularity = Counter()
+    alice = User(name="Alice Wonderland", email="alice@example.com")
+    bob = User(name="Bob Builder", email="bob@example.com")
+    book = Book(title="Python for Beginners", author="Guido van Rossum", isbn="111222333")
+    assert register_loan(store, popularity, alice, book) is True
+    assert register_loan(store, popularity, alice, book) is False, "A duplicate loan should be rejected"
+    assert register_loan(store, popularity, bob, book) is True
+    assert store.holders("111222333") == [alice, bob], "Both users should hold the book"
+    assert register_return(store, alice, book) is True
+    assert register_return(store, alice, book) is False, "Returning a book twice should fail"
+    assert store.holders("111222333") == [bob], "Only Bob should hold the book after Alice returns it"
+    assert store.to_loans() == {alice: [], bob: [book]}, "The store should convert back to a loans dict"
+    assert LoanStore(store.to_loans())[bob] == [book], "The store should load an existing loans dict"
+    held = store[bob]
+    assert book in held and held[0] == book and store[alice] == [], "loans[user] should read like a list"
+    with pytest.raises(TypeError):
+        held.append(book)
+    register_return(store, bob, book)
+    assert len(held) == 0, "Views should reflect later returns"
+
+def test_popularity_tracker_exact_mode_matches_counter():
+    tracker = PopularityTracker()
+    popularity = Counter()
+    user = User(name="Alice Wonderland", email="alice@example.com")
+    books = [Book(title=f"Book {i}", author="Author", isbn=str(i)) for i in range(6)]
+    sequence = [0, 1, 2, 1, 3, 1, 2, 4, 5, 2, 2, 0]
+    for index in sequence:
+        register_loan(defaultdict(list), tracker, user, books[index])
+        popularity[books[index]] += 1
+    assert dict(tracker.items()) == dict(popularity), "Exact mode should count like a Counter"
+    assert [count for _, count in most_popular_books(tracker, 3)] == [4, 3, 2]
+    assert most_popular_books(tracker, 1) == most_popular_books(popularity, 1)
+
+def test_popularity_tracker_approximate_mode():
+    tracker = PopularityTracker(capacity=3)
+    stream = ["hot"] * 50 + [f"cold {i}" for i in range(20)] + ["warm"] * 30 + ["hot"] * 10
+    for item in stream:
+        tracker[item] += 1
+    assert len(tracker) == 3, "Approximate mode should keep at most 'capacity' items"
+    top = tracker.most_common(2)
+    assert [item for item, _ in top] == ["hot", "warm"], "Heavy hitters should be kept in approximate mode"
+    assert top[0][1] - tracker.error("hot") <= 60 <= top[0][1], "The true count should lie within the error bound"
+
+def test_windowed_popularity_expires_old_loans():
+    now = [0.0]
+    windows = trending_windows(clock=lambda: now[0])
+    user = User(name="Alice Wonderland", email="alice@example.com")
+    old_book = Book(title="Old News", author="Someone", isbn="1")
+    new_book = Book(title="Hot Topic", author="Someone", isbn="2")
+    for _ in range(3):
+        register_loan(defaultdict(list), Counter(), user, old_book, windows=windows.values())
+    now[0] = 2 * 3600
+    register_loan(defaultdict(list), Counter(), user, new_book, windows=windows.values())
+    assert windows["hour"].most_common(2) == [(new_book, 1)], "Loans older than an hour should expire"
+    assert windows["day"].most_common(2) == [(old_book, 3), (new_book, 1)], "The day window should keep both"
+    assert windows["week"].count(old_book, now=8 * 86400) == 0, "Everything should expire after a week"
+
+def test_windowed_popularity_buckets():
+    window = WindowedPopularity(window=10, buckets=5)
+    for second in range(10):
+        window.record("book", now=second)
+    assert window.count("book", now=9) == 10
+    assert window.count("book", now=11) == 8, "The oldest bucket should expire when the window moves"
+    assert window.most_common(now=100) == [], "A window far in the future should be empty"
+
+def _journaled_session(journal, loans, popularity, users, books):
+    register_loan(loans, popularity, users[0], books[0], journal=journal)
+    register_loan(loans, popularity, users[1], books[0], journal=journal)
+    register_loan(loans, popularity, users[0], books[1], journal=journal)
+    register_return(loans, users[0], books[0], journal=journal)
+
+def test_loan_journal_recovers_from_snapshot_and_log(tmp_path):
+    users = [User(name="Alice", email="alice@example.com"), User(name="Bob", email="bob@example.com")]
+    books = [Book(title="Python 101", author="Someone", isbn="1"), Book(title="Más Python", author="Ñandú", isbn="2")]
+    with LoanJournal(tmp_path, Book, User, sync_every=2) as journal:
+        loans, popularity = journal.recover()
+        _journaled_session(journal, loans, popularity, users, books)
+        journal.snapshot(loans, popularity)
+        register_loan(loans, popularity, users[1], books[1], journal=journal)
+
+    with LoanJournal(tmp_path, Book, User) as journal:
+        recovered_loans, recovered_popularity = journal.recover()
+    assert dict(recovered_loans) == {users[0]: [books[1]], users[1]: [books[0], books[1]]}
+    assert recovered_popularity == popularity, "Popularity should be rebuilt from snapshot plus log tail"
+
+def test_loan_journal_discards_torn_record(tmp_path):
+    users = [User(name="Alice", email="alice@example.com"), User(name="Bob", email="bob@example.com")]
+    books = [Book(title="Python 101", author="Someone", isbn="1"), Book(title="Advanced", author="Expert", isbn="2")]
+    with LoanJournal(tmp_path, Book, User) as journal:
+        loans, popularity = journal.recover()
+        _journaled_session(journal, loans, popularity, users, books)
+
+    wal = tmp_path / "loans.wal"
+    wal.write_bytes(wal.read_bytes()[:-5])
+    with LoanJournal(tmp_path, Book, User) as journal:
+        loans, popularity = journal.recover()
+        assert loans[users[0]] == [books[0], books[1]], "The torn return should be discarded"
+        assert popularity == Counter({books[0]: 2, books[1]: 1})
+        register_return(loans, users[0], books[1], journal=journal)
+
+    with LoanJournal(tmp_path, Book, User) as journal:
+        loans, _ = journal.recover()
+    assert loans[users[0]] == [books[0]], "Records appended after recovery should replay"
+
+def test_ingest_loans_csv_matches_sequential_calls(tmp_path):
+    rows = ["action,name,email,title,author,isbn"]
+    operations = []
+    for i in range(60):
+        action = "return" if i % 7 == 3 else "loan"
+        user = User(name=f"User {i % 4}", email=f"user{i % 4}@example.com")
+        book = Book(title=f"Book {i % 5}", author="Author, Jr.", isbn=str(i % 5))
+        rows.append(f'{action},{user.name},{user.email},{book.title},"{book.author}",{book.isbn}')
+        operations.append((action, user, book))
+    path = tmp_path / "loans.csv"
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    loans, popularity = defaultdict(list), Counter()
+    expected_loans = expected_returns = 0
+    for action, user, book in operations:
+        if action == "loan":
+            expected_loans += register_loan(loans, popularity, user, book)
+        else:
+            expected_returns += register_return(loans, user, book)
+
+    for store in (defaultdict(list), LoanStore()):
+        bulk_popularity = Counter()
+        counts = ingest_loans_csv(path, store, bulk_popularity, Book, User, chunk_size=8)
+        assert counts == (expected_loans, expected_returns), "Duplicate loans should be rejected as in sequence"
+        assert dict(store.items()) == dict(loans), "Bulk ingestion should leave the same loans"
+        assert list(bulk_popularity.items()) == list(popularity.items()), "Popularity should match sequential calls"
+
+def test_identity_registry_keys_loans_by_id(tmp_path):
+    books, users = define_registries(Book, User)
+    book = Book(title="Python for Beginners", author="Guido van Rossum", isbn="111222333")
+    book_id = books.intern(book)
+    assert books.intern(Book(title="Python for Beginners", author="Guido van Rossum", isbn="111222333")) == book_id
+    assert books[book_id] == book, "The registry should rebuild the original tuple"
+    assert books.attribute(book_id, "title") == "Python for Beginners"
+
+    store, popularity = LoanStore(books=books), Counter()
+    alice = users.intern(User(name="Alice Wonderland", email="alice@example.com"))
+    assert register_loan(store, popularity, alice, book_id) is True
+    assert store.holders("111222333") == [alice], "Holder queries should still use the ISBN"
+    assert books.resolve(most_popular_books(popularity, 1)) == [(book, 1)]
+
+    path = tmp_path / "loans.csv"
+    path.write_text("action,name,email,title,author,isbn\nloan,Bob,bob@example.com,Other,Someone,999\n")
+    ingest_loans_csv(path, store, popularity, Book, User, books=books, users=users)
+    assert store.holders("999") == [users.id_of("bob@example.com")], "Bulk ingestion should intern into the registries"
+
+def test_concurrent_loan_desk_stress():
+    desk = ConcurrentLoanDesk(shards=4)
+    users = [User(name=f"User {i}", email=f"user{i}@example.com") for i in range(10)]
+    books = [Book(title=f"Book {i}", author="Author", isbn=str(i)) for i in range(5)]
+    loans_per_thread = 2_000
+    successes = Counter()
+
+    def worker(seed):
+        accepted = 0
+        for i in range(loans_per_thread):
+            user, book = users[(seed + i) % len(users)], books[(seed * 7 + i) % len(books)]
+            if desk.register_loan(user, book):
+                accepted += 1
+            elif desk.register_return(user, book):
+                accepted -= 1
+        successes[seed] = accepted
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(desk.popularity().values()) == 8 * loans_per_thread, "Every loan request should be counted once"
+    assert sum(len(desk.loans_of(user)) for user in users) == sum(successes.values()), \
+        "Outstanding loans should equal accepted loans minus accepted returns"
+    for book in books:
+        holders = desk.holders(book.isbn)
+        assert all(book in desk.loans_of(user) for user in holders), "The holder index should stay consistent"
+
+def test_popularity_tracker_as_bulk_counter(tmp_path):
+    users = [User(name="Alice", email="alice@example.com"), User(name="Bob", email="bob@example.com")]
+    books = [Book(title="Python 101", author="Someone", isbn="1"), Book(title="Más Python", author="Ñandú", isbn="2")]
+    with LoanJournal(tmp_path, Book, User) as journal:
+        loans, popularity = journal.recover()
+        _journaled_session(journal, loans, popularity, users, books)
+        journal.snapshot(loans, popularity)
+    with LoanJournal(tmp_path, Book, User) as journal:
+        _, tracker = journal.recover(popularity=PopularityTracker())
+    assert dict(tracker.items()) == dict(popularity), "Recovery should seed counts greater than one"
+
+    path = tmp_path / "loans.csv"
+    path.write_text("action,name,email,title,author,isbn\n" + "loan,Bob,bob@example.com,Other,Someone,9\n" * 3)
+    ingest_loans_csv(path, defaultdict(list), tracker, Book, User)
+    assert tracker.most_common(1) == [(Book(title="Other", author="Someone", isbn="9"), 3)]
+    tracker.update(["x", "x"])
+    assert tracker["x"] == 2
+    with pytest.raises(ValueError):
+        tracker["x"] = 1
+
+def test_ingest_loans_csv_keeps_popularity_of_rows_before_an_error(tmp_path):
+    path = tmp_path / "loans.csv"
+    path.write_text("action,name,email,title,author,isbn\nloan,Bob,bob@example.com,Other,Someone,9\n"
+                    "lend,Bob,bob@example.com,Other,Someone,9\n")
+    loans, popularity = defaultdict(list), Counter()
+    with pytest.raises(ValueError):
+        ingest_loans_csv(path, loans, popularity, Book, User)
+    book = Book(title="Other", author="Someone", isbn="9")
+    assert loans[User(name="Bob", email="bob@example.com")] == [book]
+    assert popularity == Counter({book: 1}), "Rows applied before the error should count as popular"
+
+def test_loan_journal_snapshots_automatically(tmp_path):
+    users = [User(name="Alice", email="alice@example.com"), User(name="Bob", email="bob@example.com")]
+    books = [Book(title="Python 101", author="Someone", isbn="1"), Book(title="Más Python", author="Ñandú", isbn="2")]
+    with LoanJournal(tmp_path, Book, User, snapshot_every=3) as journal:
+        loans, popularity = journal.recover()
+        _journaled_session(journal, loans, popularity, users, books)
+        assert journal.generation == 1, "The third record should have triggered a snapshot"
+        path = tmp_path / "loans.csv"
+        path.write_text("action,name,email,title,author,isbn\n" + "loan,Bob,bob@example.com,Other,Someone,9\n" * 3)
+        ingest_loans_csv(path, loans, popularity, Book, User, journal=journal)
+        assert journal.generation == 2, "Bulk ingestion should snapshot once the chunk is applied"
+
+    with LoanJournal(tmp_path, Book, User) as journal:
+        recovered_loans, recovered_popularity = journal.recover()
+    assert dict(recovered_loans) == {user: held for user, held in loans.items() if held}
+    assert recovered_popularity == popularity
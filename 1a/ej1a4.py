@@ -42,8 +42,17 @@ Salida esperada:
 `Enum` para estados de tarea y `typing.NamedTuple` para la estructura de datos de tarea.
 """
 
+from array import array
+from bisect import bisect_left, bisect_right, insort
 from enum import Enum
-from typing import NamedTuple, Dict
+from typing import Any, Callable, NamedTuple, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
 
 
 class TaskStatus(Enum):
@@ -56,32 +65,120 @@ class Task(NamedTuple):
     id: int
     title: str
     status: TaskStatus
+
+
+class TaskTable(dict):
+    """Diccionario de tareas que cuenta en `version` cada modificación.
+
+    `TaskStore` compara `version` con la última que ha indexado, de modo que detecta cualquier
+    cambio hecho directamente sobre el diccionario, aunque no cambie su tamaño.
+    """
+
+    version = 0
+
+    def __setitem__(self, task_id: int, task: Task) -> None:
+        super().__setitem__(task_id, task)
+        self.version += 1
+
+    def __delitem__(self, task_id: int) -> None:
+        super().__delitem__(task_id)
+        self.version += 1
+
+    def __ior__(self, other: Any) -> "TaskTable":
+        super().__ior__(other)
+        self.version += 1
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+
+    def pop(self, *args: Any) -> Any:
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self) -> Tuple[int, Task]:
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, task_id: int, default: Optional[Task] = None) -> Optional[Task]:
+        self.version += 1
+        return super().setdefault(task_id, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        super().update(*args, **kwargs)
+        self.version += 1
     
     
-tasks: Dict[int, Task] = {}
-next_id = 1
+tasks: Dict[int, Task] = TaskTable()
 
 def create_task(title: str) -> int:
-    global next_id, tasks
-    new_task = Task(id=next_id, title=title, status=TaskStatus.PENDING)
-    task[next_id] = new_task
-    current_id = next_id
-    next_id += 1
-    return current_id
+    return _default_manager.create_task(title)
 
 def change_task_status(task_id: int, new_status: TaskStatus) -> bool:
-    global tasks
-    if task_id not in tasks:
-        return False
+    return _default_manager.change_task_status(task_id, new_status)
+
+
+def _paginate(task_ids: Iterable[int], source: Dict[int, Task], status: Optional[TaskStatus],
+              page_size: int) -> Iterator[List[Task]]:
+    if page_size <= 0:
+        raise ValueError("page_size must be positive")
+    page = []
+    for task_id in task_ids:
+        task = source.get(task_id)
+        if task is None or (status is not None and task.status is not status):
+            continue
+        page.append(task)
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _ids_after(sorted_ids: List[int], after_id: int, batch_size: int) -> Iterator[int]:
+    # Cada lote se localiza de nuevo con bisect, así que la lista puede cambiar entre lotes.
+    while True:
+        start = bisect_right(sorted_ids, after_id)
+        batch = sorted_ids[start:start + batch_size]
+        if not batch:
+            return
+        yield from batch
+        after_id = batch[-1]
+
+
+def iter_task_pages(after_id: int = 0, status: Optional[TaskStatus] = None, page_size: int = 100,
+                    source: Optional[Dict[int, Task]] = None) -> Iterator[List[Task]]:
+    """Genera páginas de tareas en orden de id, empezando después del cursor `after_id`.
+
+    Sin `source` se usa el tablero por defecto (ver `TaskStore.iter_pages`); con un diccionario
+    cualquiera se recorre el rango de ids hasta el mayor, sin depender del orden de inserción.
+    """
+    if source is None:
+        return _default_manager.iter_pages(after_id, status, page_size)
+    return _paginate(range(after_id + 1, max(source, default=0) + 1), source, status, page_size)
+
+
+def list_tasks_page(after_id: int = 0, status: Optional[TaskStatus] = None, page_size: int = 100,
+                    source: Optional[Dict[int, Task]] = None) -> Tuple[List[Task], Optional[int]]:
+    """Devuelve una página y el cursor para pedir la siguiente (`None` si no hay más)."""
+    page = next(iter_task_pages(after_id, status, page_size, source), [])
+    return page, page[-1].id if len(page) == page_size else None
+
 
-    current_task = tasks[task_id]
-    updated_task = Task(
-        id=current_task.id,
-        title=current_task.title,
-        status=new_status
-    )
-    tasks[task_id] = updated_task
-    return True
+def _write_pages(stream: Optional[TextIO], pages: Iterable[List[Task]]) -> int:
+    stream = sys.stdout if stream is None else stream
+    written = 0
+    for page in pages:
+        stream.writelines(f"ID: {task.id}, Title: {task.title}, Status: {task.status.value}\n" for task in page)
+        written += len(page)
+    return written
+
+
+def write_tasks(stream: Optional[TextIO] = None, status: Optional[TaskStatus] = None, page_size: int = 1000,
+                source: Optional[Dict[int, Task]] = None) -> int:
+    """Escribe las tareas página a página con `writelines` y devuelve cuántas se han escrito."""
+    return _write_pages(stream, iter_task_pages(status=status, page_size=page_size, source=source))
 
 
 def list_tasks() -> None:
@@ -93,18 +190,426 @@ def list_tasks() -> None:
     print("\n== Lista de tareas ===")
     print("_" * 40)
 
-    for task_id, task in sorted(tasks.items()):
-        print(f"ID: {task.id}, Title: {task.title}, status: {task.status.value}")
+    write_tasks()
 
     print("_" * 40)
-    status_counts = {}
-    for task in tasks.values():
-        status = task.status.value
-        status_counts[status] = status_counts.get(status, 0) + 1
-
     print("\nEstadísticas:")
-    for status, count in status_counts.items():
-        print(f" {status}: {count} tareas(s)")
+    for status, count in _default_manager.counts().items():
+        if count:
+            print(f" {status.value}: {count} tareas(s)")
+
+
+class TransitionLog:
+    """Historial append-only de transiciones de estado, guardado por columnas en `array`.
+
+    Cada transición ocupa una fila `(task_id, estado anterior, estado nuevo, timestamp)` con el
+    timestamp de un reloj monotónico en nanosegundos; la creación de una tarea se registra con
+    estado anterior -1 y su eliminación con estado nuevo -1. Cada `snapshot_every` transiciones se
+    guarda una instantánea de los estados, de modo que `tasks_at` reconstruye el tablero en
+    cualquier instante reproduciendo solo las transiciones desde la instantánea anterior.
+    """
+
+    CREATED = -1
+    REMOVED = -1
+
+    def __init__(self, snapshot_every: int = 10_000, clock: Callable[[], int] = time.monotonic_ns) -> None:
+        if snapshot_every <= 0:
+            raise ValueError("snapshot_every must be positive")
+        self.task_ids = array("q")
+        self.old_statuses = array("b")
+        self.new_statuses = array("b")
+        self.timestamps = array("q")
+        self.titles: Dict[int, str] = {}
+        self.snapshot_every = snapshot_every
+        self._clock = clock
+        self._statuses = list(TaskStatus)
+        self._codes = {status: code for code, status in enumerate(self._statuses)}
+        self._current: Dict[int, int] = {}
+        self._snapshot_positions: List[int] = [0]
+        self._snapshots: List[Dict[int, int]] = [{}]
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def append(self, task_id: int, old_status: Optional[TaskStatus], new_status: Optional[TaskStatus],
+               title: Optional[str] = None, timestamp: Optional[int] = None) -> None:
+        """Registra una transición; `new_status=None` indica que la tarea se ha eliminado."""
+        if title is not None:
+            self.titles[task_id] = title
+        elif new_status is not None and task_id not in self.titles:
+            raise ValueError(f"task {task_id} has no logged title: log its creation first or use reconcile()")
+        code = self.REMOVED if new_status is None else self._codes[new_status]
+        self.task_ids.append(task_id)
+        self.old_statuses.append(self.CREATED if old_status is None else self._codes[old_status])
+        self.new_statuses.append(code)
+        self.timestamps.append(self._clock() if timestamp is None else timestamp)
+        if new_status is None:
+            self._current.pop(task_id, None)
+        else:
+            self._current[task_id] = code
+        if len(self.task_ids) % self.snapshot_every == 0:
+            self._snapshot_positions.append(len(self.task_ids))
+            self._snapshots.append(dict(self._current))
+
+    def reconcile(self, tasks: Dict[int, Task]) -> None:
+        """Registra como transiciones las diferencias entre el último estado conocido y `tasks`.
+
+        Las tareas que faltan se dan por eliminadas y las desconocidas por creadas ahora.
+        """
+        for task_id in [task_id for task_id in self._current if task_id not in tasks]:
+            self.append(task_id, self._statuses[self._current[task_id]], None)
+        for task in tasks.values():
+            code = self._current.get(task.id)
+            if code is None:
+                self.append(task.id, None, task.status, task.title)
+            elif self._statuses[code] is not task.status:
+                self.append(task.id, self._statuses[code], task.status)
+
+    def tasks_at(self, timestamp: int) -> Dict[int, Task]:
+        """Estado del tablero tras aplicar todas las transiciones con timestamp <= `timestamp`."""
+        position = bisect_right(self.timestamps, timestamp)
+        snapshot = bisect_right(self._snapshot_positions, position) - 1
+        state = dict(self._snapshots[snapshot])
+        for index in range(self._snapshot_positions[snapshot], position):
+            if self.new_statuses[index] == self.REMOVED:
+                state.pop(self.task_ids[index], None)
+            else:
+                state[self.task_ids[index]] = self.new_statuses[index]
+        return {
+            task_id: Task(id=task_id, title=self.titles[task_id], status=self._statuses[code])
+            for task_id, code in sorted(state.items())
+        }
+
+    def time_in_status(self, now: Optional[int] = None) -> Dict[TaskStatus, float]:
+        """Segundos acumulados por todas las tareas en cada estado, calculados con NumPy."""
+        totals = dict.fromkeys(self._statuses, 0.0)
+        if not self.task_ids:
+            return totals
+        now = self._clock() if now is None else now
+        task_ids = np.frombuffer(self.task_ids, dtype=np.int64)
+        timestamps = np.frombuffer(self.timestamps, dtype=np.int64)
+        statuses = np.frombuffer(self.new_statuses, dtype=np.int8)
+
+        # Cada estado dura hasta la siguiente transición de la misma tarea, o hasta `now`.
+        order = np.lexsort((np.arange(len(task_ids)), task_ids))
+        task_ids, timestamps, statuses = task_ids[order], timestamps[order], statuses[order]
+        ends = np.empty_like(timestamps)
+        ends[:-1] = timestamps[1:]
+        last = np.ones(len(task_ids), dtype=bool)
+        last[:-1] = task_ids[1:] != task_ids[:-1]
+        ends[last] = now
+        alive = statuses != self.REMOVED
+        durations = np.bincount(statuses[alive], weights=(ends - timestamps)[alive], minlength=len(self._statuses))
+        for status, nanoseconds in zip(self._statuses, durations):
+            totals[status] = float(nanoseconds) / 1e9
+        return totals
+
+
+class TaskStore:
+    """Almacén de tareas con un índice de ids por estado y contadores por estado siempre al día.
+
+    `tasks_in_status` y `count` no recorren todas las tareas, y cada estado guarda además sus ids
+    ordenados (mantenidos con `bisect`) para paginar por estado sin reordenar. Las tareas se guardan en una
+    `TaskTable` (un diccionario normal se copia en una): si se modifica desde fuera, por ejemplo con
+    `tasks.clear()` o reemplazando una tarea, el cambio de versión se detecta y se reindexa.
+    Con `log`, cada creación y cambio de estado se añade también al `TransitionLog`; las tareas
+    existentes al adjuntarlo y los cambios externos se registran al reindexar.
+    """
+
+    def __init__(self, tasks: Optional[Dict[int, Task]] = None, log: Optional[TransitionLog] = None) -> None:
+        self.tasks: TaskTable = tasks if isinstance(tasks, TaskTable) else TaskTable({} if tasks is None else tasks)
+        self.log = log
+        self._by_status: Dict[TaskStatus, Dict[int, None]] = {status: {} for status in TaskStatus}
+        self._ids_by_status: Dict[TaskStatus, List[int]] = {status: [] for status in TaskStatus}
+        self._reindex()
+
+    def _reindex(self) -> None:
+        for task_ids in self._by_status.values():
+            task_ids.clear()
+        for task in self.tasks.values():
+            self._by_status[task.status][task.id] = None
+        for status, task_ids in self._by_status.items():
+            self._ids_by_status[status][:] = sorted(task_ids)
+        self._version = self.tasks.version
+        self._next_id = max(self.tasks, default=0) + 1
+        if self.log is not None:
+            self.log.reconcile(self.tasks)
+
+    def _sync(self) -> None:
+        if self.tasks.version != self._version:
+            self._reindex()
+
+    def _store(self, task: Task, old_status: Optional[TaskStatus]) -> None:
+        self.tasks[task.id] = task
+        self._version = self.tasks.version
+        if old_status is not None:
+            del self._by_status[old_status][task.id]
+            sorted_ids = self._ids_by_status[old_status]
+            del sorted_ids[bisect_left(sorted_ids, task.id)]
+        self._by_status[task.status][task.id] = None
+        insort(self._ids_by_status[task.status], task.id)
+        if self.log is not None:
+            self.log.append(task.id, old_status, task.status, task.title if old_status is None else None)
+
+    def _create(self, title: str) -> int:
+        task_id = self._next_id
+        self._next_id += 1
+        self._store(Task(id=task_id, title=title, status=TaskStatus.PENDING), None)
+        return task_id
+
+    def _change(self, task_id: int, new_status: TaskStatus) -> bool:
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        if task.status is not new_status:
+            self._store(task._replace(status=new_status), task.status)
+        return True
+
+    def create_task(self, title: str) -> int:
+        self._sync()
+        return self._create(title)
+
+    def change_task_status(self, task_id: int, new_status: TaskStatus) -> bool:
+        self._sync()
+        return self._change(task_id, new_status)
+
+    def create_tasks(self, titles: Iterable[str]) -> List[int]:
+        self._sync()
+        return [self._create(title) for title in titles]
+
+    def change_statuses(self, changes: Iterable[Tuple[int, TaskStatus]]) -> List[bool]:
+        self._sync()
+        return [self._change(task_id, new_status) for task_id, new_status in changes]
+
+    def count(self, status: TaskStatus) -> int:
+        self._sync()
+        return len(self._by_status[status])
+
+    def counts(self) -> Dict[TaskStatus, int]:
+        self._sync()
+        return {status: len(task_ids) for status, task_ids in self._by_status.items()}
+
+    def tasks_in_status(self, status: TaskStatus) -> Iterator[Task]:
+        self._sync()
+        for task_id in list(self._by_status[status]):
+            yield self.tasks[task_id]
+
+    def iter_pages(self, after_id: int = 0, status: Optional[TaskStatus] = None,
+                   page_size: int = 100) -> Iterator[List[Task]]:
+        """Páginas en orden de id; con `status` se recorren solo los ids ordenados de ese estado."""
+        self._sync()
+        if status is None:
+            task_ids: Iterable[int] = range(after_id + 1, self._next_id)
+        else:
+            task_ids = _ids_after(self._ids_by_status[status], after_id, page_size)
+        return _paginate(task_ids, self.tasks, status, page_size)
+
+    def write(self, stream: Optional[TextIO] = None, status: Optional[TaskStatus] = None,
+              page_size: int = 1000) -> int:
+        self._sync()
+        return _write_pages(stream, self.iter_pages(status=status, page_size=page_size))
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self.tasks)
+
+
+class TaskManager(TaskStore):
+    """`TaskStore` seguro entre hilos: un tablero de tareas independiente por instancia.
+
+    Un único lock protege la asignación de ids y los cambios de estado; los métodos por lotes
+    (`create_tasks`, `change_statuses`) lo adquieren una sola vez para todo el lote. Las funciones
+    del módulo trabajan sobre una instancia por defecto cuyo diccionario es `tasks`.
+    """
+
+    def __init__(self, tasks: Optional[Dict[int, Task]] = None, log: Optional[TransitionLog] = None) -> None:
+        self._lock = threading.RLock()
+        super().__init__(tasks, log)
+
+    def create_task(self, title: str) -> int:
+        with self._lock:
+            return super().create_task(title)
+
+    def change_task_status(self, task_id: int, new_status: TaskStatus) -> bool:
+        with self._lock:
+            return super().change_task_status(task_id, new_status)
+
+    def create_tasks(self, titles: Iterable[str]) -> List[int]:
+        with self._lock:
+            return super().create_tasks(titles)
+
+    def change_statuses(self, changes: Iterable[Tuple[int, TaskStatus]]) -> List[bool]:
+        with self._lock:
+            return super().change_statuses(changes)
+
+    def count(self, status: TaskStatus) -> int:
+        with self._lock:
+            return super().count(status)
+
+    def counts(self) -> Dict[TaskStatus, int]:
+        with self._lock:
+            return super().counts()
+
+    def tasks_in_status(self, status: TaskStatus) -> Iterator[Task]:
+        with self._lock:
+            return iter(list(super().tasks_in_status(status)))
+
+    def iter_pages(self, after_id: int = 0, status: Optional[TaskStatus] = None,
+                   page_size: int = 100) -> Iterator[List[Task]]:
+        with self._lock:
+            return super().iter_pages(after_id, status, page_size)
+
+    def write(self, stream: Optional[TextIO] = None, status: Optional[TaskStatus] = None,
+              page_size: int = 1000) -> int:
+        with self._lock:
+            return super().write(stream, status, page_size)
+
+
+class SQLiteTaskStore(TaskManager):
+    """`TaskManager` persistido en SQLite (modo WAL, con índice por estado).
+
+    Varios procesos pueden compartir la base de datos: cada instancia reserva bloques de
+    `batch_size` ids en la tabla `task_ids` dentro de una transacción `BEGIN IMMEDIATE`, y las
+    tareas nuevas se escriben con `INSERT`, de modo que una colisión falla en vez de pisar datos.
+    Los ids reservados y no usados al cerrar se pierden.
+
+    Las escrituras se acumulan y se vuelcan en una sola transacción cada `batch_size` tareas
+    modificadas (varias escrituras de la misma tarea se combinan en una) o al llamar a `flush`.
+    El diccionario `tasks` es una caché en memoria que sirve las consultas de listado y recuento;
+    `get_task` consulta la base de datos si la tarea no está en caché y `reload` la recarga entera.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], batch_size: int = 1000,
+                 log: Optional[TransitionLog] = None) -> None:
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.batch_size = batch_size
+        self._pending: Dict[int, Task] = {}
+        self._new: Dict[int, None] = {}
+        self._reserved = range(0)
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, title TEXT NOT NULL, status TEXT NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS task_ids (next_id INTEGER NOT NULL)")
+        super().__init__(self._load(), log)
+
+    def _load(self) -> TaskTable:
+        rows = self._connection.execute("SELECT id, title, status FROM tasks ORDER BY id")
+        return TaskTable(
+            (task_id, Task(id=task_id, title=title, status=TaskStatus(status))) for task_id, title, status in rows
+        )
+
+    def _immediate(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(self._connection)
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        return result
+
+    def _reserve_ids(self, connection: sqlite3.Connection) -> range:
+        row = connection.execute("SELECT next_id FROM task_ids").fetchone()
+        start = max(row[0] if row else 1, connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()[0])
+        if row is None:
+            connection.execute("INSERT INTO task_ids (next_id) VALUES (?)", (start + self.batch_size,))
+        else:
+            connection.execute("UPDATE task_ids SET next_id = ?", (start + self.batch_size,))
+        return range(start, start + self.batch_size)
+
+    def _create(self, title: str) -> int:
+        if not self._reserved:
+            self._reserved = self._immediate(self._reserve_ids)
+        task_id = self._reserved[0]
+        self._reserved = self._reserved[1:]
+        self._next_id = max(self._next_id, task_id + 1)
+        self._new[task_id] = None
+        self._store(Task(id=task_id, title=title, status=TaskStatus.PENDING), None)
+        return task_id
+
+    def _store(self, task: Task, old_status: Optional[TaskStatus]) -> None:
+        super()._store(task, old_status)
+        self._pending[task.id] = task
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _write_pending(self, connection: sqlite3.Connection) -> None:
+        connection.executemany(
+            "INSERT INTO tasks (id, title, status) VALUES (?, ?, ?)",
+            ((task.id, task.title, task.status.value) for task in self._pending.values() if task.id in self._new),
+        )
+        connection.executemany(
+            "UPDATE tasks SET status = ? WHERE id = ?",
+            ((task.status.value, task.id) for task in self._pending.values() if task.id not in self._new),
+        )
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            self._immediate(self._write_pending)
+            self._pending.clear()
+            self._new.clear()
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        with self._lock:
+            self._sync()
+            task = self.tasks.get(task_id)
+            if task is None:
+                row = self._connection.execute(
+                    "SELECT title, status FROM tasks WHERE id = ?", (task_id,)
+                ).fetchone()
+                if row is not None:
+                    task = Task(id=task_id, title=row[0], status=TaskStatus(row[1]))
+                    # Se indexa sin encolarla: la fila ya está en la base de datos.
+                    TaskStore._store(self, task, None)
+                    self._next_id = max(self._next_id, task_id + 1)
+            return task
+
+    def reload(self) -> None:
+        with self._lock:
+            self.flush()
+            self.tasks.clear()
+            self.tasks.update(self._load())
+            self._reindex()
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self) -> "SQLiteTaskStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def benchmark_task_backends(n: int = 50_000, batch_size: int = 1000) -> Dict[str, float]:
+    """Operaciones por segundo (crear `n` tareas y cambiar el estado de la mitad) por backend."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        backends = (
+            ("dict", lambda: TaskManager()),
+            ("sqlite", lambda: SQLiteTaskStore(os.path.join(directory, "tasks.db"), batch_size)),
+        )
+        for label, factory in backends:
+            store = factory()
+            start = time.perf_counter()
+            ids = store.create_tasks(f"Task {i}" for i in range(n))
+            store.change_statuses((task_id, TaskStatus.COMPLETED) for task_id in ids[::2])
+            if isinstance(store, SQLiteTaskStore):
+                store.close()
+            results[label] = (n + len(ids[::2])) / (time.perf_counter() - start)
+    return results
+
+
+_default_manager = TaskManager(tasks)
+
 
 # Para probar el código, descomenta las siguientes líneas 
 if __name__ == "__main__":
@@ -1,5 +1,8 @@
+import io
+import threading
 import pytest
-from ej1a4 import create_task, change_task_status, tasks, TaskStatus, list_tasks
+from ej1a4 import create_task, change_task_status, tasks, TaskStatus, list_tasks, Task, TaskStore
+from ej1a4 import iter_task_pages, list_tasks_page, TaskManager, TransitionLog, SQLiteTaskStore
 
 @pytest.fixture
 def setup_task_system() -> None:
@@ -29,3 +32,158 @@ def test_list_tasks(capfd, setup_task_system) -> None:
     out, _ = capfd.readouterr()
     assert "ID: 1, Title: List task, Status: In Progress" in out, "Task 1 should be listed as 'In Progress'."
     assert "ID: 2, Title: Another list task, Status: Pending" in out, "Task 2 should be listed as 'Pending'."
+
+def test_task_store_status_index() -> None:
+    store = TaskStore()
+    ids = [store.create_task(f"Task {i}") for i in range(1, 6)]
+    assert ids == [1, 2, 3, 4, 5], "Task ids should be consecutive."
+    store.change_task_status(2, TaskStatus.IN_PROGRESS)
+    store.change_task_status(4, TaskStatus.COMPLETED)
+    store.change_task_status(2, TaskStatus.COMPLETED)
+    assert store.change_task_status(999, TaskStatus.COMPLETED) is False
+    assert store.counts() == {TaskStatus.PENDING: 3, TaskStatus.IN_PROGRESS: 0, TaskStatus.COMPLETED: 2}
+    assert [task.id for task in store.tasks_in_status(TaskStatus.COMPLETED)] == [4, 2]
+    assert store.tasks[2] == Task(id=2, title="Task 2", status=TaskStatus.COMPLETED)
+
+def test_task_store_reindexes_external_changes() -> None:
+    store = TaskStore({1: Task(id=1, title="Existing", status=TaskStatus.IN_PROGRESS)})
+    assert store.count(TaskStatus.IN_PROGRESS) == 1, "Existing tasks should be indexed."
+    assert store.create_task("New") == 2, "Ids should continue after the existing tasks."
+    store.tasks.clear()
+    assert store.count(TaskStatus.PENDING) == 0, "Clearing the dict should reset the index."
+    assert store.create_task("Fresh") == 1, "Ids should restart on an empty board."
+
+def test_task_pagination(setup_task_system) -> None:
+    for i in range(1, 8):
+        create_task(f"Task {i}")
+    change_task_status(3, TaskStatus.COMPLETED)
+    change_task_status(6, TaskStatus.COMPLETED)
+    page, cursor = list_tasks_page(page_size=3)
+    assert [task.id for task in page] == [1, 2, 3] and cursor == 3, "The first page should end at id 3."
+    page, cursor = list_tasks_page(after_id=cursor, page_size=3)
+    assert [task.id for task in page] == [4, 5, 6] and cursor == 6
+    page, cursor = list_tasks_page(after_id=cursor, page_size=3)
+    assert [task.id for task in page] == [7] and cursor is None, "The last page should not return a cursor."
+    pages = iter_task_pages(status=TaskStatus.COMPLETED, page_size=1)
+    assert [[task.id for task in page] for page in pages] == [[3], [6]], "Pages should respect the status filter."
+
+def test_write_tasks_to_stream(setup_task_system) -> None:
+    store = TaskStore()
+    store.create_task("First")
+    store.change_task_status(store.create_task("Second"), TaskStatus.IN_PROGRESS)
+    stream = io.StringIO()
+    assert store.write(stream, status=TaskStatus.IN_PROGRESS) == 1
+    assert stream.getvalue() == "ID: 2, Title: Second, Status: In Progress\n"
+
+def test_task_manager_concurrent_batches() -> None:
+    manager = TaskManager()
+    created = []
+
+    def worker(worker_id: int) -> None:
+        ids = manager.create_tasks(f"Task {worker_id}-{i}" for i in range(200))
+        created.extend(ids)
+        manager.change_statuses((task_id, TaskStatus.COMPLETED) for task_id in ids[::2])
+
+    threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(created) == list(range(1, 1601)), "Concurrent creation should never hand out duplicate ids."
+    assert manager.counts() == {TaskStatus.PENDING: 800, TaskStatus.IN_PROGRESS: 0, TaskStatus.COMPLETED: 800}
+    assert TaskManager().create_task("Independent board") == 1, "Each manager should have its own ids."
+
+def test_transition_log_replay_and_time_in_status() -> None:
+    clock = iter(range(0, 10_000_000_000, 1_000_000_000))
+    log = TransitionLog(snapshot_every=2, clock=lambda: next(clock))
+    manager = TaskManager(log=log)
+    first = manager.create_task("First")                      # t=0s
+    second = manager.create_task("Second")                    # t=1s
+    manager.change_task_status(first, TaskStatus.IN_PROGRESS)  # t=2s
+    manager.change_task_status(first, TaskStatus.IN_PROGRESS)  # sin cambio: no se registra
+    manager.change_task_status(second, TaskStatus.COMPLETED)   # t=3s
+    manager.change_task_status(first, TaskStatus.COMPLETED)    # t=4s
+    assert len(log) == 5, "Only real transitions should be logged."
+
+    assert log.tasks_at(2_500_000_000) == {
+        first: Task(id=first, title="First", status=TaskStatus.IN_PROGRESS),
+        second: Task(id=second, title="Second", status=TaskStatus.PENDING),
+    }, "The board should be rebuilt at any point in time."
+    assert log.tasks_at(10_000_000_000) == manager.tasks, "Replaying everything should give the current board."
+    assert log.tasks_at(-1) == {}, "Nothing existed before the first transition."
+
+    totals = log.time_in_status(now=5_000_000_000)
+    assert totals == {TaskStatus.PENDING: 4.0, TaskStatus.IN_PROGRESS: 2.0, TaskStatus.COMPLETED: 3.0}
+
+def test_sqlite_task_store_persists_batches(tmp_path) -> None:
+    path = tmp_path / "tasks.db"
+    with SQLiteTaskStore(path, batch_size=3) as store:
+        ids = store.create_tasks(["First", "Second"])
+        store.change_task_status(ids[0], TaskStatus.IN_PROGRESS)
+        assert store.count(TaskStatus.IN_PROGRESS) == 1, "Reads should be served from the cache."
+        with SQLiteTaskStore(path) as reader:
+            assert len(reader) == 0, "Writes below the batch size should still be pending."
+        store.change_task_status(ids[1], TaskStatus.COMPLETED)
+        store.create_task("Third")
+        with SQLiteTaskStore(path) as reader:
+            assert len(reader) == 3, "A full batch should have been flushed in one transaction."
+        journal_mode = store._connection.execute("PRAGMA journal_mode").fetchone()[0]
+        assert journal_mode == "wal", "The database should use WAL mode."
+
+    with SQLiteTaskStore(path) as store:
+        assert store.tasks == {
+            1: Task(id=1, title="First", status=TaskStatus.IN_PROGRESS),
+            2: Task(id=2, title="Second", status=TaskStatus.COMPLETED),
+            3: Task(id=3, title="Third", status=TaskStatus.PENDING),
+        }, "Closing the store should flush the remaining writes."
+        assert store.create_task("Fourth") == 4, "Ids should continue after the persisted tasks."
+
+def test_sqlite_task_stores_share_a_database(tmp_path) -> None:
+    path = tmp_path / "tasks.db"
+    with SQLiteTaskStore(path, batch_size=10) as first, SQLiteTaskStore(path, batch_size=10) as second:
+        assert first.create_task("from s1") == 1
+        assert second.create_task("from s2") == 11, "Each handle should reserve its own block of ids."
+        second.flush()
+        assert first.get_task(11) == Task(id=11, title="from s2", status=TaskStatus.PENDING), \
+            "Cache misses should be read through from the database."
+        first.change_task_status(11, TaskStatus.COMPLETED)
+        assert [task.id for task in next(first.iter_pages())] == [1, 11]
+    with SQLiteTaskStore(path) as store:
+        assert [(task.title, task.status) for task in store.tasks.values()] == [
+            ("from s1", TaskStatus.PENDING), ("from s2", TaskStatus.COMPLETED)]
+        assert store.create_task("Later") == 21
+
+def test_task_store_detects_same_size_changes(setup_task_system) -> None:
+    create_task("First")
+    create_task("Second")
+    tasks[1] = tasks[1]._replace(status=TaskStatus.COMPLETED)
+    assert change_task_status(1, TaskStatus.PENDING) is True, "Replacing a task should be detected."
+    tasks.clear()
+    tasks[1] = Task(id=1, title="By hand", status=TaskStatus.PENDING)
+    tasks[2] = Task(id=2, title="Also by hand", status=TaskStatus.IN_PROGRESS)
+    assert change_task_status(2, TaskStatus.COMPLETED) is True, "Same-size rewrites should be reindexed."
+    assert create_task("Third") == 3
+
+def test_task_pages_do_not_rely_on_insertion_order() -> None:
+    source = {5: Task(id=5, title="Five", status=TaskStatus.PENDING), 2: Task(id=2, title="Two", status=TaskStatus.PENDING)}
+    assert [[task.id for task in page] for page in iter_task_pages(source=source)] == [[2, 5]]
+    store = TaskStore(source)
+    store.change_task_status(5, TaskStatus.COMPLETED)
+    store.create_tasks(["Six", "Seven"])
+    store.change_task_status(2, TaskStatus.COMPLETED)
+    pages = store.iter_pages(after_id=2, status=TaskStatus.COMPLETED, page_size=1)
+    assert [[task.id for task in page] for page in pages] == [[5]], "Status pages should come from the index."
+    assert [task.id for task in next(store.iter_pages(after_id=4))] == [5, 6, 7]
+
+def test_transition_log_reconciles_existing_and_removed_tasks() -> None:
+    clock = iter(range(0, 10_000_000_000, 1_000_000_000))
+    log = TransitionLog(clock=lambda: next(clock))
+    manager = TaskManager({1: Task(id=1, title="Existing", status=TaskStatus.IN_PROGRESS)}, log=log)  # t=0s
+    manager.change_task_status(1, TaskStatus.COMPLETED)                                               # t=1s
+    assert log.tasks_at(1_000_000_000) == {1: Task(id=1, title="Existing", status=TaskStatus.COMPLETED)}
+    manager.tasks.clear()
+    assert manager.count(TaskStatus.COMPLETED) == 0                                                   # t=2s
+    assert log.tasks_at(2_000_000_000) == {}, "Tasks removed from the dict should be logged as removed."
+    assert log.time_in_status(now=5_000_000_000)[TaskStatus.COMPLETED] == 1.0
+    with pytest.raises(ValueError):
+        log.append(7, TaskStatus.PENDING, TaskStatus.COMPLETED)
@@ -39,11 +39,21 @@ nombres, categorías, cantidades y precios.
 - Buscar productos específicos en el inventario de una tienda mediante `dataclasses`.
 """
 
+from array import array
+from bisect import bisect_left, bisect_right, insort
 from dataclasses import dataclass
-from typing import Dict, Tuple, Optional, List
+from itertools import islice
+from operator import attrgetter, itemgetter
+from typing import Callable, Dict, Iterable, Iterator, Tuple, Optional, List, TextIO
+import csv
+import io
+import json
+import sys
+import time
+import tracemalloc
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     name: str
     category: str
@@ -51,33 +61,405 @@ class Product:
     price: float
     
 
-inventory: Dict[Tuple[str, str], Product] = {}
+ProductKey = Tuple[str, str]
+
+
+class ProductTable(dict):
+    """Diccionario de productos que cuenta en `version` cada modificación.
+
+    `Inventory` compara `version` con la última que ha indexado, de modo que detecta cualquier
+    cambio hecho directamente sobre el diccionario, aunque no cambie su tamaño.
+    """
+
+    version = 0
+
+    def __setitem__(self, key: ProductKey, product: Product) -> None:
+        super().__setitem__(key, product)
+        self.version += 1
+
+    def __delitem__(self, key: ProductKey) -> None:
+        super().__delitem__(key)
+        self.version += 1
+
+    def __ior__(self, other: object) -> "ProductTable":
+        super().__ior__(other)
+        self.version += 1
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+
+    def pop(self, *args: object) -> object:
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self) -> Tuple[ProductKey, Product]:
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, key: ProductKey, default: Optional[Product] = None) -> Optional[Product]:
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args: object, **kwargs: object) -> None:
+        super().update(*args, **kwargs)
+        self.version += 1
+
+
+inventory: Dict[ProductKey, Product] = ProductTable()
+
+_value = itemgetter(0)
+
+EXPORT_FIELDS = ("name", "category", "quantity", "price")
+EXPORT_FORMATS = ("text", "csv", "jsonl")
+
+
+def _format_product(product: Product) -> str:
+    return f"{product.name} ({product.category}) - {product.quantity} units at ${product.price:.2f} each"
+
+
+def _value_range(index: List[Tuple[float, ProductKey]], low: Optional[float], high: Optional[float]) -> List[ProductKey]:
+    start = 0 if low is None else bisect_left(index, low, key=_value)
+    stop = len(index) if high is None else bisect_right(index, high, key=_value)
+    return [key for _, key in index[start:stop]]
+
+
+class Inventory:
+    """Inventario con un índice por categoría y listas ordenadas por cantidad y por precio.
+
+    Los índices ordenados son listas de pares `(valor, clave)` mantenidas con `bisect`, de modo
+    que las consultas por categoría y por rango cuestan O(log n) más el tamaño del resultado.
+    Los valores indexados se guardan aparte, así que modificar a mano un `Product` no corrompe
+    los índices, pero las consultas no lo reflejan hasta la siguiente llamada a `add_product` de ese
+    producto: las altas y actualizaciones deben pasar por `add_product`. Los productos se guardan
+    en una `ProductTable` (un diccionario normal se copia en una): si se modifica desde fuera, por
+    ejemplo con `inventory.clear()` o sustituyendo un producto, el cambio de versión se detecta y
+    se reindexa.
+    """
+
+    def __init__(self, products: Optional[Dict[ProductKey, Product]] = None) -> None:
+        self.products: ProductTable = (
+            products if isinstance(products, ProductTable) else ProductTable({} if products is None else products)
+        )
+        self._by_category: Dict[str, Dict[ProductKey, None]] = {}
+        self._by_quantity: List[Tuple[int, ProductKey]] = []
+        self._by_price: List[Tuple[float, ProductKey]] = []
+        self._quantity_of: Dict[ProductKey, int] = {}
+        self._price_of: Dict[ProductKey, float] = {}
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._by_category.clear()
+        for key, product in self.products.items():
+            self._by_category.setdefault(product.category, {})[key] = None
+        self._quantity_of = {key: product.quantity for key, product in self.products.items()}
+        self._price_of = {key: product.price for key, product in self.products.items()}
+        self._by_quantity[:] = sorted((quantity, key) for key, quantity in self._quantity_of.items())
+        self._by_price[:] = sorted((price, key) for key, price in self._price_of.items())
+        self._version = self.products.version
+
+    def _sync(self) -> None:
+        if self.products.version != self._version:
+            self._reindex()
+
+    @staticmethod
+    def _move(index: list, values: dict, key: ProductKey, new_value) -> None:
+        old_value = values[key]
+        if old_value != new_value:
+            position = bisect_left(index, (old_value, key))
+            assert index[position] == (old_value, key), "sorted index out of sync"
+            del index[position]
+            insort(index, (new_value, key))
+            values[key] = new_value
+
+    def add_product(self, name: str, category: str, quantity: int, price: float) -> Product:
+        self._sync()
+        key = (name, category)
+        product = self.products.get(key)
+        if product is None:
+            product = Product(name=name, category=category, quantity=quantity, price=price)
+            self.products[key] = product
+            self._version = self.products.version
+            self._by_category.setdefault(category, {})[key] = None
+            self._quantity_of[key] = quantity
+            self._price_of[key] = price
+            insort(self._by_quantity, (quantity, key))
+            insort(self._by_price, (price, key))
+            return product
+        product.quantity += quantity
+        product.price = price
+        self._move(self._by_quantity, self._quantity_of, key, product.quantity)
+        self._move(self._by_price, self._price_of, key, price)
+        return product
+
+    def find_product(self, name: str, category: str) -> Optional[Product]:
+        return self.products.get((name, category))
+
+    def by_category(self, category: str) -> List[Product]:
+        self._sync()
+        return [self.products[key] for key in self._by_category.get(category, ())]
+
+    def quantity_range(self, low: Optional[int] = None, high: Optional[int] = None) -> List[Product]:
+        """Productos con `low <= quantity <= high`, de menor a mayor cantidad."""
+        self._sync()
+        return [self.products[key] for key in _value_range(self._by_quantity, low, high)]
+
+    def price_range(self, low: Optional[float] = None, high: Optional[float] = None) -> List[Product]:
+        """Productos con `low <= price <= high`, de menor a mayor precio."""
+        self._sync()
+        return [self.products[key] for key in _value_range(self._by_price, low, high)]
+
+    def low_stock(self, threshold: int) -> List[Product]:
+        return self.quantity_range(high=threshold)
+
+    def iter_products(self, category: Optional[str] = None, sort_by: Optional[str] = None,
+                      reverse: bool = False) -> Iterator[Product]:
+        """Recorre los productos, opcionalmente de una categoría y ordenados por un campo.
+
+        Por cantidad o precio se recorren directamente los índices ordenados; por nombre o
+        categoría se ordena la lista de referencias a los productos seleccionados.
+        """
+        self._sync()
+        if sort_by in ("quantity", "price"):
+            index = self._by_quantity if sort_by == "quantity" else self._by_price
+            keys = (key for _, key in (reversed(index) if reverse else index))
+            if category is not None:
+                keys = (key for key in keys if key[1] == category)
+            return (self.products[key] for key in keys)
+        if category is None:
+            products: Iterable[Product] = self.products.values()
+        else:
+            products = (self.products[key] for key in self._by_category.get(category, ()))
+        if sort_by is None:
+            return iter(products)
+        if sort_by not in EXPORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {EXPORT_FIELDS}, got {sort_by!r}")
+        return iter(sorted(products, key=attrgetter(sort_by), reverse=reverse))
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+
+class ProductView:
+    """Vista de una fila de `ColumnarInventory` con la misma interfaz que `Product`."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "ColumnarInventory", row: int) -> None:
+        self._store = store
+        self._row = row
+
+    @property
+    def name(self) -> str:
+        return self._store._names[self._row]
+
+    @property
+    def category(self) -> str:
+        return self._store._categories[self._store._category_ids[self._row]]
+
+    @property
+    def quantity(self) -> int:
+        return self._store._quantities[self._row]
+
+    @quantity.setter
+    def quantity(self, value: int) -> None:
+        self._store._quantities[self._row] = value
+
+    @property
+    def price(self) -> float:
+        return self._store._prices[self._row]
+
+    @price.setter
+    def price(self, value: float) -> None:
+        self._store._prices[self._row] = value
+
+    def to_product(self) -> Product:
+        return Product(name=self.name, category=self.category, quantity=self.quantity, price=self.price)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (Product, ProductView)):
+            return (self.name, self.category, self.quantity, self.price) == (
+                other.name, other.category, other.quantity, other.price)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ProductView(name={self.name!r}, category={self.category!r}, quantity={self.quantity!r}, price={self.price!r})"
+
+
+class ColumnarInventory:
+    """Inventario en columnas: categorías internadas como ids en `array('l')`, cantidades en
+    `array('q')` y precios en `array('d')`. No crea un objeto por producto; `find_product` y la
+    iteración devuelven `ProductView` sobre la fila correspondiente. Las filas se localizan con un
+    diccionario nombre -> fila por categoría, sin tuplas de clave.
+    """
+
+    def __init__(self) -> None:
+        self._categories: List[str] = []
+        self._rows: List[Dict[str, int]] = []
+        self._category_index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._category_ids = array("l")
+        self._quantities = array("q")
+        self._prices = array("d")
+
+    def add_product(self, name: str, category: str, quantity: int, price: float) -> ProductView:
+        category_id = self._category_index.get(category)
+        if category_id is None:
+            category_id = self._category_index[category] = len(self._categories)
+            self._categories.append(category)
+            self._rows.append({})
+        rows = self._rows[category_id]
+        row = rows.get(name)
+        if row is None:
+            row = rows[name] = len(self._names)
+            self._names.append(name)
+            self._category_ids.append(category_id)
+            self._quantities.append(quantity)
+            self._prices.append(price)
+        else:
+            self._quantities[row] += quantity
+            self._prices[row] = price
+        return ProductView(self, row)
+
+    def find_product(self, name: str, category: str) -> Optional[ProductView]:
+        category_id = self._category_index.get(category)
+        row = None if category_id is None else self._rows[category_id].get(name)
+        return None if row is None else ProductView(self, row)
+
+    def __len__(self) -> int:
+        return len(self._quantities)
+
+    def __iter__(self) -> Iterator[ProductView]:
+        return (ProductView(self, row) for row in range(len(self._quantities)))
+
+
+@dataclass
+class _PlainProduct:
+    """`Product` sin `slots=True`, como era antes; solo se usa como referencia en el benchmark."""
+    name: str
+    category: str
+    quantity: int
+    price: float
+
+
+def _build_dict(product_type: type, rows: List[Tuple[str, str, int, float]]) -> Dict[ProductKey, object]:
+    return {(name, category): product_type(name, category, quantity, price) for name, category, quantity, price in rows}
+
+
+def _build_columnar(rows: List[Tuple[str, str, int, float]]) -> ColumnarInventory:
+    store = ColumnarInventory()
+    for row in rows:
+        store.add_product(*row)
+    return store
+
+
+def benchmark_inventory(n: int = 1_000_000, lookups: int = 100_000) -> Dict[str, Dict[str, float]]:
+    """Bytes por SKU y nanosegundos por búsqueda de cada representación del inventario.
+
+    - `dataclass`: diccionario de `Product` sin slots (la versión original).
+    - `slots`: diccionario de `Product` con slots.
+    - `inventory`: `Inventory` completo, con sus índices por categoría, cantidad y precio; se
+      construye en bloque desde el diccionario, con los mismos índices que deja `add_product`.
+    - `columnar`: `ColumnarInventory`.
+
+    Los nombres y categorías se generan antes de medir y no cuentan en ninguno.
+    """
+    names = [f"Product {i}" for i in range(n)]
+    categories = [f"Category {i}" for i in range(100)]
+    rows = [(name, categories[i % 100], i, float(i % 1000) / 100) for i, name in enumerate(names)]
+    probes = [(names[i * 7919 % n], categories[i * 7919 % n % 100]) for i in range(lookups)]
+    builders = (
+        ("dataclass", lambda: _build_dict(_PlainProduct, rows), lambda store: store.get),
+        ("slots", lambda: _build_dict(Product, rows), lambda store: store.get),
+        ("inventory", lambda: Inventory(_build_dict(Product, rows)),
+         lambda store: lambda key: store.find_product(*key)),
+        ("columnar", lambda: _build_columnar(rows), lambda store: lambda key: store.find_product(*key)),
+    )
+    results = {}
+    for label, build, finder in builders:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        store = build()
+        size = (tracemalloc.get_traced_memory()[0] - before) / n
+        tracemalloc.stop()
+        find = finder(store)
+        start = time.perf_counter()
+        for probe in probes:
+            find(probe)
+        results[label] = {"bytes_per_sku": size, "lookup_ns": (time.perf_counter() - start) / lookups * 1e9}
+        del store, find
+    return results
+
+
+_default_inventory = Inventory(inventory)
 
 
 def add_product(name: str, category: str, quantity: int, price: float) -> Product:
-    # Complete the code
-    
-    key = (name, category)
-    if key in inventory:
-        existing_product = inventory[key]
-        existing_product.quantity += quantity
-        existing_product.price = price
-        return existing_product
-    else:
-        new_product = Product(name=name, category=category, quantity=quantity, price=price)
-        inventory[key] = new_product
-        return new_product
-    
+    return _default_inventory.add_product(name, category, quantity, price)
+
+
+def _csv_lines(products: Iterable[Product]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+    for product in products:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow((product.name, product.category, product.quantity, product.price))
+        yield buffer.getvalue()
+
+
+def iter_product_lines(products: Iterable[Product], fmt: str = "text") -> Iterator[str]:
+    """Genera una línea terminada en salto de línea por producto (`csv` añade una cabecera)."""
+    if fmt == "text":
+        return (_format_product(product) + "\n" for product in products)
+    if fmt == "csv":
+        return _csv_lines(products)
+    if fmt == "jsonl":
+        return (json.dumps({"name": product.name, "category": product.category, "quantity": product.quantity,
+                            "price": product.price}, ensure_ascii=False) + "\n" for product in products)
+    raise ValueError(f"fmt must be one of {EXPORT_FORMATS}, got {fmt!r}")
+
+
+def export_products(sink: Optional[TextIO] = None, fmt: str = "text", category: Optional[str] = None,
+                    sort_by: Optional[str] = None, reverse: bool = False,
+                    where: Optional[Callable[[Product], bool]] = None, chunk_size: int = 1000,
+                    source: Optional[Inventory] = None) -> int:
+    """Escribe los productos en `sink` en bloques de `chunk_size` líneas con `writelines`.
+
+    Solo se mantiene en memoria un bloque de líneas a la vez. Devuelve cuántos productos se han
+    escrito.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    sink = sys.stdout if sink is None else sink
+    source = _default_inventory if source is None else source
+    products = source.iter_products(category, sort_by, reverse)
+    if where is not None:
+        products = filter(where, products)
+    lines = iter_product_lines(products, fmt)
+    written = 0
+    if fmt == "csv":
+        sink.write(next(lines))
+    while chunk := list(islice(lines, chunk_size)):
+        sink.writelines(chunk)
+        written += len(chunk)
+    return written
+
+
 def list_products() -> str:
     if not inventory:
         return "El inventario está vacío."
+    return "\n".join(_format_product(product) for product in _default_inventory.iter_products())
 
-    result_lines = []
-    
-    for product in :
-            (f"{product.name} ({product.category}) - {product.quantity} units at ${product.price:.2f} each")
-    return "\n". join(result_lines)
-        
+
+def list_products_by_category(category: str) -> str:
+    products = _default_inventory.by_category(category)
+    if not products:
+        return f"No hay productos en la categoría {category}."
+    return "\n".join(_format_product(product) for product in products)
 
 
 def find_product(name: str, category: str) -> Optional[Product]:
@@ -85,6 +467,14 @@ def find_product(name: str, category: str) -> Optional[Product]:
     return inventory.get(key)
 
 
+def find_low_stock(threshold: int) -> List[Product]:
+    return _default_inventory.low_stock(threshold)
+
+
+def find_products_in_price_range(low: Optional[float] = None, high: Optional[float] = None) -> List[Product]:
+    return _default_inventory.price_range(low, high)
+
+
 # Para probar el código, descomenta las siguientes líneas
 if __name__ == "__main__":
     print("=== SISTEMA DE INVENTARIO ===\n")
@@ -131,3 +521,7 @@ if __name__ == "__main__":
     print(list_products_by_category("Fruits"))
     print(list_products_by_category("Dairy"))
     print(list_products_by_category("Bakery"))
+
+    # Exportar en CSV ordenado por precio
+    print("\n=== EXPORTACION CSV ===")
+    export_products(fmt="csv", sort_by="price")
@@ -1,5 +1,9 @@
+import io
+import json
 import pytest
 from ej1a5 import add_product, find_product, list_products, inventory, Product
+from ej1a5 import Inventory, list_products_by_category, find_low_stock, find_products_in_price_range
+from ej1a5 import ColumnarInventory, benchmark_inventory, export_products
 
 @pytest.fixture
 def setup_inventory():
@@ -30,3 +34,77 @@ def test_list_products(setup_inventory):
     add_product("Bananas", "Fruits", 30, 0.45)
     expected_output = "Bananas (Fruits) - 30 units at $0.45 each"
     assert list_products() == expected_output, "The list_products output should match the expected output."
+
+def test_inventory_indexes_follow_updates(setup_inventory):
+    add_product("Apples", "Fruits", 100, 0.50)
+    add_product("Milk", "Dairy", 30, 1.20)
+    add_product("Cheese", "Dairy", 20, 3.50)
+    add_product("Milk", "Dairy", 20, 1.25)
+    assert [p.name for p in Inventory(inventory).by_category("Dairy")] == ["Milk", "Cheese"]
+    assert [p.name for p in find_low_stock(50)] == ["Cheese", "Milk"], "Updated quantities should be reindexed."
+    assert [p.name for p in find_products_in_price_range(1.0, 3.5)] == ["Milk", "Cheese"]
+    assert find_products_in_price_range(high=0.49) == []
+    assert list_products_by_category("Dairy") == (
+        "Milk (Dairy) - 50 units at $1.25 each\nCheese (Dairy) - 20 units at $3.50 each"
+    )
+
+    inventory.clear()
+    add_product("Bread", "Bakery", 40, 2.00)
+    assert list_products_by_category("Dairy") == "No hay productos en la categoría Dairy."
+    assert [p.name for p in find_low_stock(100)] == ["Bread"], "Clearing the inventory should reset the indexes."
+
+def test_columnar_inventory_views():
+    store = ColumnarInventory()
+    store.add_product("Apples", "Fruits", 100, 0.50)
+    store.add_product("Milk", "Dairy", 30, 1.20)
+    view = store.add_product("Apples", "Fruits", 50, 0.55)
+    assert view == Product("Apples", "Fruits", 150, 0.55), "Views should compare equal to the matching Product."
+    found = store.find_product("Milk", "Dairy")
+    found.quantity -= 10
+    assert store.find_product("Milk", "Dairy").to_product() == Product("Milk", "Dairy", 20, 1.20)
+    assert store.find_product("Milk", "Fruits") is None
+    assert len(store) == 2 and [p.name for p in store] == ["Apples", "Milk"]
+    assert not hasattr(Product("Pears", "Fruits", 1, 1.0), "__dict__"), "Product should use __slots__."
+
+    assert set(benchmark_inventory(n=100, lookups=10)) == {"dataclass", "slots", "inventory", "columnar"}
+
+def test_export_products_formats(setup_inventory):
+    add_product("Apples", "Fruits", 100, 0.50)
+    add_product("Milk", "Dairy", 30, 1.20)
+    add_product("Cheese", "Dairy", 20, 3.50)
+    add_product("Bread", "Bakery", 40, 2.00)
+
+    sink = io.StringIO()
+    assert export_products(sink, sort_by="price", reverse=True, chunk_size=3) == 4
+    assert sink.getvalue().splitlines()[0] == "Cheese (Dairy) - 20 units at $3.50 each"
+
+    sink = io.StringIO()
+    assert export_products(sink, fmt="csv", category="Dairy", sort_by="name") == 2
+    assert sink.getvalue() == "name,category,quantity,price\nCheese,Dairy,20,3.5\nMilk,Dairy,30,1.2\n"
+
+    sink = io.StringIO()
+    assert export_products(sink, fmt="jsonl", where=lambda product: product.quantity > 35) == 2
+    rows = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert [row["name"] for row in rows] == ["Apples", "Bread"], "Filtered rows should keep insertion order."
+
+    with pytest.raises(ValueError):
+        export_products(io.StringIO(), fmt="xml")
+
+def test_inventory_survives_direct_product_edits(setup_inventory):
+    add_product("A", "X", 10, 1.0)
+    add_product("B", "X", 20, 1.0)
+    find_product("A", "X").quantity = 20
+    add_product("A", "X", 0, 1.0)
+    assert [p.name for p in find_low_stock(25)] == ["A", "B"], "The index should follow the edited quantity."
+    find_product("A", "X").quantity = 100
+    add_product("A", "X", 1, 1.0)
+    assert [p.name for p in find_low_stock(25)] == ["B"]
+
+def test_inventory_detects_same_size_changes(setup_inventory):
+    add_product("A", "X", 10, 1.0)
+    inventory.clear()
+    inventory[("B", "X")] = Product("B", "X", 5, 2.0)
+    assert [p.name for p in find_low_stock(100)] == ["B"], "Same-size rewrites should be reindexed."
+    assert list_products_by_category("X") == "B (X) - 5 units at $2.00 each"
+    inventory[("B", "X")] = Product("B", "X", 50, 2.0)
+    assert find_low_stock(10) == []